@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple
+from .board import Board, move_to_uci
+from .search import SearchEngine
+
+# Batch analysis: positions stream in from an EPD/FEN file, are searched by a
+# pool of worker processes with a bounded number in flight, and stream out as
+# JSONL, so memory stays flat however long the input is.
+
+Position = Tuple[int, str, Optional[str]]  # (index, fen, EPD id)
+
+
+def parse_position(line: str) -> Tuple[str, Optional[str]]:
+    # A full FEN, or an EPD record (four FEN fields plus operations)
+    fields = line.split(None, 6)
+    if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+        return " ".join(fields[:6]), None
+    fen = " ".join(fields[:4]) + " 0 1"
+    epd_id = None
+    operations = line.split(None, 4)[4] if len(fields) > 4 else ""
+    for operation in operations.split(";"):
+        opcode, _, operand = operation.strip().partition(" ")
+        if opcode == "id":
+            epd_id = operand.strip().strip('"')
+    return fen, epd_id
+
+
+def read_positions(lines: Iterable[str], start: int = 0) -> Iterator[Position]:
+    # Blank lines and # comments don't count towards the index; the first
+    # start positions are skipped without being parsed
+    index = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if index >= start:
+            fen, epd_id = parse_position(line)
+            yield index, fen, epd_id
+        index += 1
+
+
+_engine = None  # One engine per worker process, reused across positions
+
+
+def _init_worker(hash_mb: int):
+    global _engine
+    _engine = SearchEngine(Board(), hash_mb)
+
+
+def analyze_position(index: int, fen: str, epd_id: Optional[str], limits: dict) -> Dict:
+    result = {"index": index, "fen": fen}
+    if epd_id is not None:
+        result["id"] = epd_id
+    try:
+        _engine.board.set_fen(fen)
+        start = time.perf_counter()
+        score, move = _engine.search(**limits)
+        result.update(bestmove=move_to_uci(move) if move else None, score=score,
+                      depth=_engine.depth_reached, nodes=_engine.nodes,
+                      time=round(time.perf_counter() - start, 3))
+    except Exception as exc:
+        # A bad record shouldn't take the whole run down
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    return result
+
+
+def analyze(positions: Iterable[Position], workers: int = 1, limits: dict = None,
+            ordered: bool = True, max_in_flight: int = None,
+            hash_mb: int = 16) -> Iterator[Dict]:
+    # Yields one result dict per position, in input order or as completed
+    limits = limits or {}
+    max_in_flight = max_in_flight or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(hash_mb,)) as pool:
+        pending = deque() if ordered else set()
+        for index, fen, epd_id in positions:
+            if len(pending) >= max_in_flight:
+                yield from _collect(pending, ordered)
+            future = pool.submit(analyze_position, index, fen, epd_id, limits)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+        while pending:
+            yield from _collect(pending, ordered)
+
+
+def _collect(pending, ordered: bool) -> Iterator[Dict]:
+    # Wait for the oldest submission (ordered) or whichever finishes first
+    if ordered:
+        yield pending.popleft().result()
+        return
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+        yield future.result()
+
+
+class Checkpoint:
+    """Tracks how many leading positions are fully written, so a run can
+    resume after them. Results that complete out of order only advance
+    the offset once every earlier position is done; until then they are
+    remembered in completed so a resumed run doesn't analyze them again."""
+
+    def __init__(self, path: str, offset: int = 0, completed: Iterable[int] = (),
+                 position: Optional[int] = None):
+        self.path = path
+        self.offset = offset
+        self.completed = set(completed)
+        # Length of the output file when this was saved; resuming truncates
+        # back to it, dropping results the checkpoint doesn't cover
+        self.position = position
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(path)
+        return cls(path, data["offset"], data.get("completed", ()), data.get("position"))
+
+    def done(self, index: int):
+        self.completed.add(index)
+        while self.offset in self.completed:
+            self.completed.remove(self.offset)
+            self.offset += 1
+
+    def remaining(self, positions: Iterable[Position]) -> Iterator[Position]:
+        # A copy, since done() empties completed as the offset catches up
+        skip = set(self.completed)
+        return (position for position in positions if position[0] not in skip)
+
+    def save(self, position: Optional[int] = None):
+        # Write-then-rename so a crash never leaves a torn checkpoint
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"offset": self.offset, "completed": sorted(self.completed),
+                       "position": position}, f)
+        os.replace(tmp, self.path)
+
+
+def open_output(path: str, checkpoint: Optional[Checkpoint], append: bool) -> TextIO:
+    output = open(path, "a" if append else "w")
+    if checkpoint is not None and checkpoint.position is not None:
+        # Lines written after the last save are written again on resume
+        output.truncate(checkpoint.position)
+    return output
+
+
+def write_results(results: Iterable[Dict], output: TextIO,
+                  checkpoint: Optional[Checkpoint] = None, every: int = 100):
+    for count, result in enumerate(results, 1):
+        output.write(json.dumps(result) + "\n")
+        if checkpoint:
+            checkpoint.done(result["index"])
+            if count % every == 0:
+                # Results hit the disk before the offset that covers them
+                output.flush()
+                checkpoint.save(output.tell() if output.seekable() else None)
+    output.flush()
+    if checkpoint:
+        checkpoint.save(output.tell() if output.seekable() else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze EPD/FEN positions in parallel, "
+                                                 "writing one JSON result per line")
+    parser.add_argument("input", help="EPD or FEN file, one position per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", help="JSONL output file (default stdout)")
+    parser.add_argument("--depth", type=int)
+    parser.add_argument("--movetime", type=int, help="milliseconds per position")
+    parser.add_argument("--nodes", type=int)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--in-flight", type=int,
+                        help="positions queued or running at once (default 2 per worker)")
+    parser.add_argument("--hash", type=int, default=16, help="transposition table MB per worker")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write results as they complete instead of in input order")
+    parser.add_argument("--start", type=int, default=0, help="skip the first N positions")
+    parser.add_argument("--checkpoint",
+                        help="file recording progress; an existing one resumes the run, "
+                             "truncating the output to what it covers")
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    args = parser.parse_args()
+
+    limits = {"depth": args.depth, "movetime": args.movetime, "nodes": args.nodes}
+    if not any(limits.values()):
+        limits["depth"] = 4
+
+    checkpoint = Checkpoint.load(args.checkpoint) if args.checkpoint else None
+    start = max(args.start, checkpoint.offset) if checkpoint else args.start
+    if checkpoint:
+        checkpoint.offset = start
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    resuming = bool(start or (checkpoint and checkpoint.completed))
+    output = open_output(args.output, checkpoint, resuming) if args.output else sys.stdout
+    try:
+        positions = read_positions(source, start)
+        if checkpoint:
+            positions = checkpoint.remaining(positions)
+        results = analyze(positions, args.workers, limits, not args.unordered,
+                          args.in_flight, args.hash)
+        write_results(results, output, checkpoint, args.checkpoint_every)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
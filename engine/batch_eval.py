@@ -0,0 +1,217 @@
+from typing import List, Sequence, Tuple
+import numpy as np
+from .constants import *
+
+# Positions are packed one row per board into an (N, 64) int8 array in the
+# bitboard square order (0 = a8, 63 = h1): +piece for white, -piece for
+# black, 0 for empty. Side to move is a separate (N,) array of WHITE/BLACK.
+
+SQ120 = np.array([21 + rank * 10 + file for rank in range(8) for file in range(8)])
+
+# Material plus piece-square bonus for every (code + 6, square), signed for
+# white's perspective; PST_MAILBOX carries the evaluator's table lookup
+VALUE_TABLE = np.zeros((13, 64), dtype=np.int32)
+for _piece in range(PAWN, KING + 1):
+    for _i, _sq in enumerate(SQ120):
+        VALUE_TABLE[6 + _piece, _i] = PIECE_VALUES[_piece] + PST_MAILBOX[WHITE][_piece][_sq]
+        VALUE_TABLE[6 - _piece, _i] = -(PIECE_VALUES[_piece] + PST_MAILBOX[BLACK][_piece][_sq])
+
+POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+FILE_BITS = [sum(1 << (row * 8 + file) for row in range(8)) for file in range(8)]
+
+
+def _shift_spec(offset: int) -> Tuple[int, np.uint64]:
+    # Mailbox offset -> (bit shift, mask of squares that did not wrap a file)
+    rows = round(offset / 10)
+    files = offset - 10 * rows
+    keep = 0
+    for file in range(8):
+        if 0 <= file - files < 8:
+            keep |= FILE_BITS[file]
+    return 8 * rows + files, np.uint64(keep)
+
+
+SHIFTS = {offset: _shift_spec(offset)
+          for offset in set(KNIGHT_OFFSETS) | set(KING_OFFSETS)}
+
+# FEN placement characters to piece codes
+FEN_CODES = np.zeros(256, dtype=np.int8)
+for _symbol, _piece in zip('pnbrqk', range(PAWN, KING + 1)):
+    FEN_CODES[ord(_symbol)] = -_piece
+    FEN_CODES[ord(_symbol.upper())] = _piece
+# Squares each placement character covers: digits are runs of empty squares
+FEN_WIDTHS = np.zeros(256, dtype=np.intp)
+FEN_WIDTHS[[ord(c) for c in 'pnbrqkPNBRQK']] = 1
+for _n in range(1, 9):
+    FEN_WIDTHS[ord(str(_n))] = _n
+
+
+def pack_boards(boards: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    pieces = np.array([board.board for board in boards], dtype=np.int8)[:, SQ120]
+    colors = np.array([board.color for board in boards], dtype=np.int8)[:, SQ120]
+    squares = np.where(colors == BLACK, -pieces, pieces).astype(np.int8)
+    sides = np.array([board.side_to_move for board in boards], dtype=np.int8)
+    return squares, sides
+
+
+def pack_fens(fens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    # Straight from FEN text, without building Boards
+    fields = [fen.partition(' ') for fen in fens]
+    placements = ''.join([placement for placement, _, _ in fields]).encode('ascii')
+    raw = np.frombuffer(placements.translate(None, b'/'), dtype=np.uint8)
+    squares = np.repeat(FEN_CODES[raw], FEN_WIDTHS[raw])
+    sides = np.array([rest[:1] == 'b' for _, _, rest in fields], dtype=np.int8)
+    return squares.reshape(-1, 64), sides
+
+
+def to_bitboards(mask: np.ndarray) -> np.ndarray:
+    # (N, 64) bool -> (N,) uint64 with bit i set for square i
+    packed = np.packbits(mask, axis=1, bitorder='little')
+    return np.ascontiguousarray(packed).view('<u8').ravel()
+
+
+SWAR_MASKS = [np.uint64(m) for m in (0x5555555555555555, 0x3333333333333333,
+                                      0x0F0F0F0F0F0F0F0F, 0x0101010101010101)]
+
+
+def popcount(bb: np.ndarray) -> np.ndarray:
+    # Parallel bit count on whole uint64 words
+    m1, m2, m4, h01 = SWAR_MASKS
+    bb = bb - ((bb >> np.uint64(1)) & m1)
+    bb = (bb & m2) + ((bb >> np.uint64(2)) & m2)
+    bb = (bb + (bb >> np.uint64(4))) & m4
+    return ((bb * h01) >> np.uint64(56)).astype(np.int32)
+
+
+def shift(bb: np.ndarray, offset: int) -> np.ndarray:
+    amount, keep = SHIFTS[offset]
+    if amount > 0:
+        return (bb << np.uint64(amount)) & keep
+    return (bb >> np.uint64(-amount)) & keep
+
+
+def shift_bits(bb: np.ndarray, amount: int) -> np.ndarray:
+    # Plain shift towards higher squares (amount > 0) or lower ones, no wrap mask
+    if amount > 0:
+        return bb << np.uint64(amount)
+    return bb >> np.uint64(-amount)
+
+
+def ray_attacks(sliders: np.ndarray, empty: np.ndarray, direction: int) -> np.ndarray:
+    # Squares attacked along one direction, by an occluded (Kogge-Stone) fill
+    # in three doubling steps instead of seven single ones
+    amount, keep = SHIFTS[direction]
+    propagate = empty & keep
+    generate = sliders
+    for step in (amount, 2 * amount, 4 * amount):
+        generate = generate | (propagate & shift_bits(generate, step))
+        propagate = propagate & shift_bits(propagate, step)
+    return shift(generate, direction)
+
+
+def fill(bb: np.ndarray, direction: int) -> np.ndarray:
+    # Smear set squares along their files: -8 towards row 0, 8 towards row 7
+    for step in (direction, 2 * direction, 4 * direction):
+        bb = bb | shift_bits(bb, step)
+    return bb
+
+
+def sides_of(bb: np.ndarray) -> np.ndarray:
+    # Squares directly left or right of a set square
+    return shift(bb, -1) | shift(bb, 1)
+
+
+def row_counts(bb: np.ndarray) -> List[np.ndarray]:
+    # Popcount of each row; row r is byte r of the bitboard
+    rows = POPCOUNT8[bb.view(np.uint8)].reshape(-1, 8)
+    return [rows[:, r].astype(np.int32) for r in range(8)]
+
+
+class BatchEvaluator:
+    """Evaluates many packed positions at once with the same terms, and the
+    same results, as Evaluator.evaluate."""
+
+    def evaluate_boards(self, boards: Sequence) -> np.ndarray:
+        return self.evaluate(*pack_boards(boards))
+
+    def evaluate_fens(self, fens: Sequence[str]) -> np.ndarray:
+        return self.evaluate(*pack_fens(fens))
+
+    def evaluate(self, squares: np.ndarray, sides: np.ndarray) -> np.ndarray:
+        # Scores from the side to move's perspective, as an (N,) int32 array
+        score = self.evaluate_material_and_position(squares)
+
+        pieces = {code: to_bitboards(squares == code)
+                  for code in range(-KING, KING + 1) if code}
+        occupancy = [np.zeros(len(squares), dtype=np.uint64) for _ in (WHITE, BLACK)]
+        for code, bb in pieces.items():
+            occupancy[WHITE if code > 0 else BLACK] |= bb
+        score += self.evaluate_pawn_structure(pieces[PAWN], pieces[-PAWN])
+        score += self.evaluate_mobility(pieces, occupancy)
+        score += self.evaluate_king_safety(pieces)
+        return np.where(sides == WHITE, score, -score).astype(np.int32)
+
+    def evaluate_material_and_position(self, squares: np.ndarray) -> np.ndarray:
+        return VALUE_TABLE[squares.astype(np.intp) + 6, np.arange(64)].sum(axis=1, dtype=np.int32)
+
+    def evaluate_pawn_structure(self, white: np.ndarray, black: np.ndarray) -> np.ndarray:
+        # Same terms as Evaluator.compute_pawn_structure, with file fills on
+        # the pawn bitboards. White advances towards row 0 (shift -8).
+        return (self.pawn_terms(white, black, -8, PASSED_PAWN_BONUS[::-1]) -
+                self.pawn_terms(black, white, 8, PASSED_PAWN_BONUS))
+
+    def pawn_terms(self, own: np.ndarray, enemy: np.ndarray, forward: int,
+                   passed_by_row: List[int]) -> np.ndarray:
+        files = fill(fill(own, -8), 8)
+        doubled = popcount(own) - popcount(files & np.uint64(0xFF))
+        neighbour_files = sides_of(files)
+        isolated = popcount(own & ~neighbour_files)
+
+        # Backward: every neighbour has advanced past it and an enemy pawn
+        # two rows ahead on an adjacent file covers its stop square
+        level_or_behind = fill(sides_of(own), forward)
+        stop_attacked = shift_bits(sides_of(enemy), -2 * forward)
+        backward = popcount(own & neighbour_files & ~level_or_behind & stop_attacked)
+
+        # Passed: no enemy pawn ahead on this or an adjacent file
+        enemy_span = enemy | sides_of(enemy)
+        ahead = fill(shift_bits(enemy_span, -forward), -forward)
+        passed = np.zeros(len(own), dtype=np.int32)
+        for row, count in enumerate(row_counts(own & ~ahead)):
+            if passed_by_row[row]:
+                passed += passed_by_row[row] * count
+
+        return (passed - DOUBLED_PAWN_PENALTY * doubled - ISOLATED_PAWN_PENALTY * isolated
+                - BACKWARD_PAWN_PENALTY * backward)
+
+    def evaluate_mobility(self, pieces: dict, occupancy: List[np.ndarray]) -> np.ndarray:
+        # Same count as Board.count_mobility. Within one direction the rays of
+        # different pieces never overlap (the nearer piece blocks the farther
+        # one), so each direction's attacks can be filled together and
+        # counted once.
+        empty = ~(occupancy[WHITE] | occupancy[BLACK])
+        mobility = []
+        for color, sign in ((WHITE, 1), (BLACK, -1)):
+            targets = empty | occupancy[1 - color]
+            count = np.zeros(len(empty), dtype=np.int32)
+
+            knights = pieces[sign * KNIGHT]
+            for offset in KNIGHT_OFFSETS:
+                count += popcount(shift(knights, offset) & targets)
+
+            queens = pieces[sign * QUEEN]
+            for directions, sliders in ((BISHOP_DIRECTIONS, pieces[sign * BISHOP] | queens),
+                                        (ROOK_DIRECTIONS, pieces[sign * ROOK] | queens)):
+                for direction in directions:
+                    count += popcount(ray_attacks(sliders, empty, direction) & targets)
+            mobility.append(count)
+        return (mobility[WHITE] - mobility[BLACK]) * 10
+
+    def evaluate_king_safety(self, pieces: dict) -> np.ndarray:
+        # Pawn shield: own pawns on the three squares in front of the king
+        score = np.zeros(len(pieces[KING]), dtype=np.int32)
+        for sign, forward in ((1, -10), (-1, 10)):
+            king = pieces[sign * KING]
+            shield = shift(king, forward - 1) | shift(king, forward) | shift(king, forward + 1)
+            score += sign * 10 * popcount(shield & pieces[sign * PAWN])
+        return score
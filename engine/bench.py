@@ -0,0 +1,47 @@
+import argparse
+import time
+from typing import Dict, List
+from .board import Board, START_FEN
+from .perft import BACKENDS, STANDARD_POSITIONS
+
+
+def bench_fen(fens: List[str], board_class=Board, repeat: int = 2000) -> Dict[str, float]:
+    # Positions per second for building, reloading and printing FENs
+    rates = {}
+    count = len(fens) * repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for fen in fens:
+            board_class.from_fen(fen)
+    rates['from_fen'] = count / (time.perf_counter() - start)
+
+    board = board_class()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for fen in fens:
+            board.set_fen(fen)
+    rates['set_fen'] = count / (time.perf_counter() - start)
+
+    boards = [board_class.from_fen(fen) for fen in fens]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for board in boards:
+            board.get_fen()
+    rates['get_fen'] = count / (time.perf_counter() - start)
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FEN conversion throughput")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default='mailbox')
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    fens = [START_FEN] + [fen for _, fen, _ in STANDARD_POSITIONS]
+    for name, rate in bench_fen(fens, BACKENDS[args.backend], args.repeat).items():
+        print(f"{name:10s} {rate:12,.0f} positions/s")
+
+
+if __name__ == "__main__":
+    main()
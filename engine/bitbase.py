@@ -0,0 +1,269 @@
+import argparse
+import os
+import time
+from typing import Dict, Optional, Sequence, Tuple
+from .constants import *
+
+# Endgame bitbases for king and one piece against a bare king (KQK, KRK,
+# KPK), built by retrograde analysis. Positions are indexed from the strong
+# side's point of view as
+#   ((weak_to_move * 64 + strong_king) * 64 + piece) * 64 + weak_king
+# over squares 0-63 in a8..h1 order, the packed-board order of batch_eval;
+# a black strong side is probed with the board mirrored. A table file holds
+# one win bit per position (the weak side never wins these endings) followed
+# by one distance-to-mate byte: plies to mate plus one, 0 for draws and
+# impossible positions.
+
+TABLE_POSITIONS = 2 * 64 ** 3
+ENDINGS = {QUEEN: "KQK", ROOK: "KRK", PAWN: "KPK"}
+# KPK promotes into the others, so they are generated first
+GENERATION_ORDER = (QUEEN, ROOK, PAWN)
+DEFAULT_DIRECTORY = os.environ.get(
+    "CHESS_BITBASES", os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "bitbases"))
+# Most material a covered position can have: two kings and a queen
+BITBASE_MATERIAL = 2 * PIECE_VALUES[KING] + PIECE_VALUES[QUEEN]
+
+SQ120 = [21 + row * 10 + file for row in range(8) for file in range(8)]
+SQ64 = [-1] * 120
+for _index, _sq in enumerate(SQ120):
+    SQ64[_sq] = _index
+
+
+class EndgameTables:
+    """Loaded bitbases and the probe API used by search and evaluation.
+
+    probe() returns a score for the side to move, mate-distance aware like
+    search scores: MATE_SCORE - plies when winning, its negation when
+    losing, 0 for a draw. None means the position isn't covered.
+    """
+
+    def __init__(self, tables: Dict[int, Tuple[bytes, bytes]]):
+        # tables: piece -> (packed win bits, distance-to-mate bytes)
+        self.tables = tables
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_DIRECTORY) -> Optional["EndgameTables"]:
+        # Whichever tables have been generated into directory; None if none
+        tables = {}
+        for piece, name in ENDINGS.items():
+            try:
+                with open(os.path.join(directory, name + ".bb"), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            split = TABLE_POSITIONS // 8
+            tables[piece] = (data[:split], data[split:])
+        return cls(tables) if tables else None
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        for piece, (wdl, dtm) in self.tables.items():
+            with open(os.path.join(directory, ENDINGS[piece] + ".bb"), "wb") as f:
+                f.write(wdl)
+                f.write(dtm)
+
+    def index(self, pieces: Sequence[Tuple[int, int, int]], side: int) -> Optional[Tuple[int, int]]:
+        # pieces: (piece, color, square 0-63) for everything on the board.
+        # Returns (piece, table index) or None if no table covers them.
+        if len(pieces) != 3:
+            return None
+        kings = [None, None]
+        extra = None
+        for piece, color, sq in pieces:
+            if piece == KING:
+                kings[color] = sq
+            elif extra is None:
+                extra = (piece, color, sq)
+        if extra is None or extra[0] not in self.tables or None in kings:
+            return None
+        piece, strong, sq = extra
+        flip = 56 if strong == BLACK else 0
+        return piece, (((side != strong) * 64 + (kings[strong] ^ flip)) * 64 +
+                       (sq ^ flip)) * 64 + (kings[strong ^ 1] ^ flip)
+
+    def pieces(self, board) -> list:
+        if board.material[WHITE] + board.material[BLACK] > BITBASE_MATERIAL:
+            return []
+        return [(piece, color, SQ64[sq]) for color in (WHITE, BLACK)
+                for piece, squares in board.piece_lists[color].items() for sq in squares]
+
+    def probe(self, board) -> Optional[int]:
+        return self.probe_pieces(self.pieces(board), board.side_to_move)
+
+    def probe_wdl(self, board) -> Optional[int]:
+        # 1 win, 0 draw, -1 loss for the side to move; reads only the win bits
+        found = self.index(self.pieces(board), board.side_to_move)
+        if found is None:
+            return None
+        piece, index = found
+        wdl = self.tables[piece][0]
+        if not wdl[index >> 3] >> (7 - (index & 7)) & 1:
+            return 0
+        return -1 if index >= TABLE_POSITIONS // 2 else 1
+
+    def probe_squares(self, squares: Sequence[int], side: int) -> Optional[int]:
+        # A packed board row from batch_eval: +piece for white, -piece for black
+        pieces = [(abs(code), WHITE if code > 0 else BLACK, sq)
+                  for sq, code in enumerate(squares) if code]
+        return self.probe_pieces(pieces, side)
+
+    def probe_pieces(self, pieces: list, side: int) -> Optional[int]:
+        found = self.index(pieces, side)
+        if found is None:
+            return None
+        piece, index = found
+        plies = self.tables[piece][1][index]
+        if not plies:
+            return 0
+        score = MATE_SCORE - (plies - 1)
+        return -score if index >= TABLE_POSITIONS // 2 else score
+
+
+def generate(piece: int, promotions: Dict[int, Tuple[bytes, bytes]] = None) -> Tuple[bytes, bytes]:
+    # Retrograde analysis over every (strong king, piece, weak king) placement
+    # with each side to move. promotions maps a promotion piece to its
+    # generated table, which KPK needs to score a pawn reaching the last rank.
+    import numpy as np
+
+    n = 64 ** 3
+    index = np.arange(n, dtype=np.int32)
+    king, other, lone = index >> 12, index >> 6 & 63, index & 63
+    # Square 64 stands for "off the board" and steps to itself, so steps chain
+    steps = {offset: np.array([SQ64[sq + offset] if SQ64[sq + offset] >= 0 else 64
+                               for sq in SQ120] + [64], dtype=np.int32)
+             for offset in KING_OFFSETS}
+    adjacent = np.zeros((65, 65), dtype=bool)
+    for offset in KING_OFFSETS:
+        adjacent[np.arange(64), steps[offset][:64]] = True
+    adjacent[:, 64] = False
+
+    # attacks[piece_sq, king_sq, target]: the extra piece's attacks, where
+    # only the strong king can block
+    attacks = np.zeros((64, 64, 64), dtype=bool)
+    directions = {QUEEN: KING_OFFSETS, ROOK: ROOK_DIRECTIONS}.get(piece, ())
+    for sq in range(64):
+        if piece == PAWN:
+            for offset in (-11, -9):
+                target = steps[offset][sq]
+                if target < 64:
+                    attacks[sq, :, target] = True
+            continue
+        for offset in directions:
+            ray = []
+            target = steps[offset][sq]
+            while target < 64:
+                ray.append(target)
+                target = steps[offset][target]
+            for blocker in range(64):
+                for target in ray:
+                    attacks[sq, blocker, target] = True
+                    if target == blocker:
+                        break
+
+    valid = (king != other) & (king != lone) & (other != lone) & ~adjacent[king, lone]
+    if piece == PAWN:
+        valid &= (other >= 8) & (other < 56)
+    check = attacks[other, king, lone]
+    strong_valid = valid & ~check  # Strong side to move: the weak king can't be in check
+
+    # Weak side's moves: successor indexes into the strong-to-move half, and
+    # whether it can take the piece, which draws
+    weak_moves = []
+    escapes = np.zeros(n, dtype=bool)
+    for offset in KING_OFFSETS:
+        target = steps[offset][lone]
+        on_board = target < 64
+        safe = np.clip(target, 0, 63)
+        successor = king * 4096 + other * 64 + safe
+        weak_moves.append(np.where(on_board & (target != other) & strong_valid[successor],
+                                   successor, -1))
+        escapes |= on_board & (target == other) & ~adjacent[king, other]
+    weak_moves = np.stack(weak_moves)
+    weak_mobile = (weak_moves >= 0).any(axis=0) | escapes
+
+    # Strong side's moves: successors in the weak-to-move half, plus
+    # promotions into another table
+    strong_moves = []
+    for offset in KING_OFFSETS:
+        target = steps[offset][king]
+        safe = np.clip(target, 0, 63)
+        successor = safe * 4096 + other * 64 + lone
+        strong_moves.append(np.where((target < 64) & (target != other) & valid[successor],
+                                     successor, -1))
+    promoting = np.zeros(n, dtype=bool)
+    if piece == PAWN:
+        push = steps[-10][other]
+        free = (push < 64) & (push != king) & (push != lone)
+        promoting = free & (push < 8)
+        safe = np.clip(push, 0, 63)
+        strong_moves.append(np.where(free & ~promoting, king * 4096 + safe * 64 + lone, -1))
+        double = steps[-10][push]
+        free &= (other >= 48) & (double != king) & (double != lone)
+        safe = np.clip(double, 0, 63)
+        strong_moves.append(np.where(free, king * 4096 + safe * 64 + lone, -1))
+    else:
+        for offset in directions:
+            target = other
+            sliding = np.ones(n, dtype=bool)
+            for _ in range(7):
+                target = steps[offset][target]
+                sliding &= (target < 64) & (target != king) & (target != lone)
+                strong_moves.append(np.where(sliding, king * 4096 + np.clip(target, 0, 63) * 64
+                                             + lone, -1))
+    strong_moves = np.stack(strong_moves)
+
+    # Distance to mate per half, in plies plus one; 0 while undecided
+    strong_dtm = np.zeros(n, dtype=np.int16)
+    weak_dtm = np.zeros(n, dtype=np.int16)
+    weak_dtm[valid & check & ~weak_mobile] = 1
+    promoted = []
+    if promoting.any():
+        # The pawn becomes the promotion piece on the square ahead of it
+        promotion_index = king * 4096 + np.clip(steps[-10][other], 0, 63) * 64 + lone
+        for table in (promotions or {}).values():
+            dtm = np.frombuffer(table[1], dtype=np.uint8)[n:].astype(np.int16)
+            promoted.append(np.where(promoting, dtm[promotion_index], 0))
+
+    plies = 1
+    quiet = 0
+    while quiet < 2:
+        if plies % 2:
+            # Strong side to move wins if some move reaches a lost position
+            # of the previous ply
+            wins = (weak_dtm[strong_moves] == plies) & (strong_moves >= 0)
+            found = wins.any(axis=0)
+            for dtm in promoted:
+                found |= dtm == plies
+            found &= strong_valid & (strong_dtm == 0)
+            strong_dtm[found] = plies + 1
+        else:
+            # Weak side to move loses once every move reaches a won position
+            lost = ((strong_dtm[weak_moves] > 0) | (weak_moves < 0)).all(axis=0)
+            found = lost & valid & weak_mobile & ~escapes & (weak_dtm == 0)
+            weak_dtm[found] = plies + 1
+        quiet = 0 if found.any() else quiet + 1
+        plies += 1
+
+    dtm = np.concatenate([strong_dtm, weak_dtm]).astype(np.uint8)
+    return np.packbits(dtm > 0).tobytes(), dtm.tobytes()
+
+
+def generate_tables() -> EndgameTables:
+    tables = {}
+    for piece in GENERATION_ORDER:
+        promotions = {p: tables[p] for p in (QUEEN, ROOK)} if piece == PAWN else None
+        tables[piece] = generate(piece, promotions)
+    return EndgameTables(tables)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the KQK, KRK and KPK bitbases")
+    parser.add_argument("--output", default=DEFAULT_DIRECTORY, help="directory to write to")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    generate_tables().save(args.output)
+    print(f"bitbases written to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,98 @@
-from typing import List, Tuple
+from array import array
+from typing import Tuple
 from .constants import *
+from .zobrist import PIECE_KEYS, SIDE_KEY, EP_KEYS, CASTLING_MASK_KEYS
+from .movegen import MoveGenerator
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# FEN letters: FEN_PIECES['n'] == (KNIGHT, BLACK), PIECE_CHARS[BLACK][KNIGHT] == 'n'
+PIECE_CHARS = [" PNBRQK", " pnbrqk"]
+FEN_PIECES = {PIECE_CHARS[color][piece]: (piece, color)
+              for color in (WHITE, BLACK) for piece in range(PAWN, KING + 1)}
+# Per letter, everything set_fen adds up for one piece: (piece, color, value,
+# piece-square bonuses by square, Zobrist keys by square)
+_FEN_ENTRIES = {char: (piece, color, PIECE_VALUES[piece], PST_MAILBOX[color][piece],
+                       PIECE_KEYS[color][piece])
+                for char, (piece, color) in FEN_PIECES.items()}
+
+CASTLING_CHARS = {'K': WHITE_KINGSIDE, 'Q': WHITE_QUEENSIDE,
+                  'k': BLACK_KINGSIDE, 'q': BLACK_QUEENSIDE}
+
+# Empty 10x12 mailbox: -1 on the border, EMPTY on the 64 playing squares
+EMPTY_MAILBOX = array('b', [-1] * 120)
+for _sq in range(21, 99):
+    if 1 <= _sq % 10 <= 8:
+        EMPTY_MAILBOX[_sq] = EMPTY
+
+
+def square_name(square: int) -> str:
+    file = (square - 21) % 10
+    rank = 8 - (square - 21) // 10
+    return "abcdefgh"[file] + str(rank)
+
+
+def parse_square(name: str) -> int:
+    return 21 + "abcdefgh".index(name[0]) + (8 - int(name[1])) * 10
+
+
+def encode_move(from_sq: int, to_sq: int, promotion: int = 0, flags: int = 0) -> int:
+    return from_sq | to_sq << 7 | promotion << 14 | flags
+
+
+def decode_move(move: int) -> Tuple[int, int, int]:
+    return move & MOVE_SQUARE_MASK, move >> 7 & MOVE_SQUARE_MASK, move >> 14 & 7
+
+
+def move_to_uci(move: int) -> str:
+    # Packed ints from the engine; (from, to, promotion) tuples are accepted too
+    from_sq, to_sq, promotion = decode_move(move) if move.__class__ is int else move
+    uci = square_name(from_sq) + square_name(to_sq)
+    if promotion:
+        uci += "pnbrqk"[promotion - 1]
+    return uci
 
 class Board:
+    # Slots keep boards small: batch workers hold thousands and pickle them
+    # across processes (slotted objects pickle without a __dict__)
+    __slots__ = ('board', 'color', 'piece_lists', 'side_to_move', 'castling', 'ep_square',
+                 'halfmove_clock', 'fullmove_number', 'hash', 'undo_stack', 'material',
+                 'pst_score', 'pawn_hash', 'movegen')
+
     def __init__(self):
-        # 10x12 board representation with border
-        self.board = [0] * 120
-        self.color = [0] * 120
+        # 10x12 board representation with border, one signed byte per square
+        self.board = array('b', bytes(120))
+        self.color = array('b', bytes(120))
+        # Squares occupied by each piece type, kept current by add/remove/move_piece
         self.piece_lists = {color: {piece: [] for piece in range(1, 7)} 
                           for color in [WHITE, BLACK]}
         self.side_to_move = WHITE
-        self.castling_rights = {WHITE: (True, True), BLACK: (True, True)}
+        self.castling = ALL_CASTLING  # Bitmask of WHITE_KINGSIDE etc.
         self.ep_square = None
         self.halfmove_clock = 0
         self.fullmove_number = 1
+        self.hash = 0
+        # One (move, piece, captured, captured_sq, ep_square, castling mask, halfmove, hash)
+        # record per move made, popped by unmake_move
+        self.undo_stack = []
+        # Running material and piece-square sums per color
+        self.material = [0, 0]
+        self.pst_score = [0, 0]
+        # Zobrist key over pawns only, for the pawn structure cache
+        self.pawn_hash = 0
         self.init_board()
+        self.refresh_state()
         # Initialize movegen after board setup
-        from .movegen import MoveGenerator
-        self.movegen = MoveGenerator(self)
+        self.movegen = self.create_movegen()
+
+    def create_movegen(self):
+        # Backends override this to pair the board with their own generator
+        return MoveGenerator(self)
 
     def init_board(self):
         # Initialize empty board with border squares marked as invalid
-        self.board = [-1] * 120  # Use -1 for border squares
-        self.color = [EMPTY] * 120
+        self.board = array('b', [-1] * 120)  # Use -1 for border squares
+        self.color = array('b', bytes(120))
         
         # Setup initial position
         piece_setup = [
@@ -50,24 +121,277 @@ class Board:
                 if self.board[sq] == -1:
                     self.board[sq] = EMPTY
 
-    def make_move(self, move: Tuple[int, int, int]) -> bool:
-        from_sq, to_sq, promotion = move
+    def refresh_state(self):
+        # Rebuild the incrementally maintained state from the mailbox,
+        # e.g. after squares were edited directly
+        self.material = [0, 0]
+        self.pst_score = [0, 0]
+        for color in (WHITE, BLACK):
+            for squares in self.piece_lists[color].values():
+                squares.clear()
+        for sq in range(21, 99):
+            piece = self.board[sq]
+            if piece != EMPTY and piece != -1:
+                color = self.color[sq]
+                self.piece_lists[color][piece].append(sq)
+                self.material[color] += PIECE_VALUES[piece]
+                self.pst_score[color] += PST_MAILBOX[color][piece][sq]
+        self.hash = self.compute_hash()
+        self.pawn_hash = 0
+        for color in (WHITE, BLACK):
+            for sq in self.piece_lists[color][PAWN]:
+                self.pawn_hash ^= PIECE_KEYS[color][PAWN][sq]
+
+    def add_piece(self, square: int, piece: int, color: int):
+        self.board[square] = piece
+        self.color[square] = color
+        self.piece_lists[color][piece].append(square)
+        self.hash ^= PIECE_KEYS[color][piece][square]
+        if piece == PAWN:
+            self.pawn_hash ^= PIECE_KEYS[color][PAWN][square]
+        self.material[color] += PIECE_VALUES[piece]
+        self.pst_score[color] += PST_MAILBOX[color][piece][square]
+
+    def remove_piece(self, square: int):
+        piece = self.board[square]
+        color = self.color[square]
+        self.board[square] = EMPTY
+        self.color[square] = EMPTY
+        self.piece_lists[color][piece].remove(square)
+        self.hash ^= PIECE_KEYS[color][piece][square]
+        if piece == PAWN:
+            self.pawn_hash ^= PIECE_KEYS[color][PAWN][square]
+        self.material[color] -= PIECE_VALUES[piece]
+        self.pst_score[color] -= PST_MAILBOX[color][piece][square]
+
+    def move_piece(self, from_sq: int, to_sq: int):
         piece = self.board[from_sq]
-        
-        # Make the move
-        self.board[to_sq] = promotion if promotion else piece
+        color = self.color[from_sq]
+        self.board[to_sq] = piece
+        self.color[to_sq] = color
         self.board[from_sq] = EMPTY
-        self.color[to_sq] = self.color[from_sq]
         self.color[from_sq] = EMPTY
+        squares = self.piece_lists[color][piece]
+        squares[squares.index(from_sq)] = to_sq
+        pst = PST_MAILBOX[color][piece]
+        self.hash ^= PIECE_KEYS[color][piece][from_sq] ^ PIECE_KEYS[color][piece][to_sq]
+        if piece == PAWN:
+            self.pawn_hash ^= PIECE_KEYS[color][PAWN][from_sq] ^ PIECE_KEYS[color][PAWN][to_sq]
+        self.pst_score[color] += pst[to_sq] - pst[from_sq]
+
+    def king_square(self, color: int) -> int:
+        kings = self.piece_lists[color][KING]
+        return kings[0] if kings else None
+
+    def is_square_attacked(self, square: int, by_color: int, ignore: int = None) -> bool:
+        # ignore is treated as empty, so a king stepping away from a slider is
+        # still seen as attacked along the ray it is leaving
+        board = self.board
+        color = self.color
+
+        # Pawns attack diagonally forward, so look diagonally backward from square
+        if by_color == WHITE:
+            pawn_squares = (square + 9, square + 11)
+        else:
+            pawn_squares = (square - 9, square - 11)
+        for sq in pawn_squares:
+            if board[sq] == PAWN and color[sq] == by_color:
+                return True
+
+        for offset in KNIGHT_OFFSETS:
+            sq = square + offset
+            if board[sq] == KNIGHT and color[sq] == by_color:
+                return True
+
+        for offset in KING_OFFSETS:
+            sq = square + offset
+            if board[sq] == KING and color[sq] == by_color:
+                return True
+
+        for directions, slider in ((ROOK_DIRECTIONS, ROOK), (BISHOP_DIRECTIONS, BISHOP)):
+            for direction in directions:
+                sq = square + direction
+                while board[sq] == EMPTY or sq == ignore:
+                    sq += direction
+                piece = board[sq]
+                if (piece == slider or piece == QUEEN) and color[sq] == by_color:
+                    return True
+        return False
+
+    def count_mobility(self, color: int) -> int:
+        # Squares attacked by knights, bishops, rooks and queens that are
+        # empty or hold an enemy piece; no move lists are built
+        board = self.board
+        colors = self.color
+        pieces = self.piece_lists[color]
+        count = 0
+
+        for sq in pieces[KNIGHT]:
+            for offset in KNIGHT_OFFSETS:
+                target = board[sq + offset]
+                if target == EMPTY or (target > EMPTY and colors[sq + offset] != color):
+                    count += 1
+
+        for piece, directions in ((BISHOP, BISHOP_DIRECTIONS), (ROOK, ROOK_DIRECTIONS),
+                                  (QUEEN, KING_OFFSETS)):
+            for sq in pieces[piece]:
+                for direction in directions:
+                    target_sq = sq + direction
+                    while board[target_sq] == EMPTY:
+                        count += 1
+                        target_sq += direction
+                    if board[target_sq] > EMPTY and colors[target_sq] != color:
+                        count += 1
+        return count
+
+    def least_valuable_attacker(self, square: int, by_color: int, removed=()) -> Tuple[int, int]:
+        # (square, piece) of by_color's cheapest attacker of square, treating the
+        # squares in removed as empty so sliders behind them x-ray through
+        board = self.board
+        color = self.color
+
+        if by_color == WHITE:
+            pawn_squares = (square + 9, square + 11)
+        else:
+            pawn_squares = (square - 9, square - 11)
+        for sq in pawn_squares:
+            if board[sq] == PAWN and color[sq] == by_color and sq not in removed:
+                return sq, PAWN
+
+        for offset in KNIGHT_OFFSETS:
+            sq = square + offset
+            if board[sq] == KNIGHT and color[sq] == by_color and sq not in removed:
+                return sq, KNIGHT
+
+        best = None
+        for directions, slider in ((BISHOP_DIRECTIONS, BISHOP), (ROOK_DIRECTIONS, ROOK)):
+            for direction in directions:
+                sq = square + direction
+                while board[sq] == EMPTY or sq in removed:
+                    sq += direction
+                piece = board[sq]
+                if (piece == slider or piece == QUEEN) and color[sq] == by_color:
+                    if best is None or PIECE_VALUES[piece] < PIECE_VALUES[best[1]]:
+                        best = (sq, piece)
+        if best is not None:
+            return best
+
+        for offset in KING_OFFSETS:
+            sq = square + offset
+            if board[sq] == KING and color[sq] == by_color and sq not in removed:
+                return sq, KING
+        return None
+
+    def see(self, move: int) -> int:
+        # Static exchange evaluation: material won by the side making move once
+        # both sides have recaptured on the target square with their cheapest
+        # pieces, each free to stop when continuing would lose. Pins are ignored.
+        from_sq = move & MOVE_SQUARE_MASK
+        to_sq = move >> 7 & MOVE_SQUARE_MASK
+        promotion = move >> 14 & 7
+        piece = self.board[from_sq]
+        side = self.color[from_sq]
+        removed = {from_sq}
+
+        victim = self.board[to_sq]
+        if victim > EMPTY:
+            gain = PIECE_VALUES[victim]
+        elif move & MOVE_EN_PASSANT:
+            gain = PIECE_VALUES[PAWN]
+            removed.add(to_sq + (10 if side == WHITE else -10))
+        else:
+            gain = 0
+        on_square = piece
+        if promotion:
+            gain += PIECE_VALUES[promotion] - PIECE_VALUES[PAWN]
+            on_square = promotion
+
+        # gains[d]: material for the side capturing at depth d if the exchange stops there
+        gains = [gain]
+        side = 1 - side
+        while True:
+            attacker = self.least_valuable_attacker(to_sq, side, removed)
+            if attacker is None:
+                break
+            gains.append(PIECE_VALUES[on_square] - gains[-1])
+            sq, on_square = attacker
+            removed.add(sq)
+            side = 1 - side
+
+        # Either side may decline to recapture; resolve from the end
+        while len(gains) > 1:
+            last = gains.pop()
+            gains[-1] = -max(-gains[-1], last)
+        return gains[0]
+
+    def in_check(self, side: int = None) -> bool:
+        if side is None:
+            side = self.side_to_move
+        king_sq = self.king_square(side)
+        return king_sq is not None and self.is_square_attacked(king_sq, 1 - side)
+
+    def compute_hash(self) -> int:
+        # Full Zobrist key from scratch; make_move keeps self.hash in sync incrementally
+        key = 0
+        for sq in range(21, 99):
+            piece = self.board[sq]
+            if piece != EMPTY and piece != -1:
+                key ^= PIECE_KEYS[self.color[sq]][piece][sq]
+        if self.side_to_move == BLACK:
+            key ^= SIDE_KEY
+        key ^= CASTLING_MASK_KEYS[self.castling]
+        if self.ep_square:
+            key ^= EP_KEYS[self.ep_square]
+        return key
+
+    def make_move(self, move: int) -> bool:
+        if move.__class__ is tuple:
+            move = self.pack_move(move)
+        from_sq = move & MOVE_SQUARE_MASK
+        to_sq = move >> 7 & MOVE_SQUARE_MASK
+        promotion = move >> 14 & 7
+        piece = self.board[from_sq]
+        side = self.color[from_sq]
+        captured = self.board[to_sq]
+        captured_sq = to_sq
+
+        if move & MOVE_EN_PASSANT:
+            captured_sq = to_sq + (10 if side == WHITE else -10)
+            captured = self.board[captured_sq]
+
+        self.undo_stack.append((move, piece, captured, captured_sq, self.ep_square,
+                                self.castling, self.halfmove_clock, self.hash))
+
+        # Remove the captured piece and make the move
+        if captured != EMPTY:
+            self.remove_piece(captured_sq)
+        if promotion:
+            self.remove_piece(from_sq)
+            self.add_piece(to_sq, promotion, side)
+        else:
+            self.move_piece(from_sq, to_sq)
+
+        # The en passant square only lives for one ply
+        if self.ep_square:
+            self.hash ^= EP_KEYS[self.ep_square]
 
         # Handle special moves (castling, en passant, etc.)
         if piece == KING:
-            self.handle_castling(from_sq, to_sq)
+            self.handle_castling(move)
         elif piece == PAWN:
-            self.handle_pawn_move(from_sq, to_sq, promotion)
+            self.handle_pawn_move(move)
+        if piece != PAWN:
+            self.ep_square = None
+
+        # Moving the king, or moving or capturing a rook on its home square,
+        # loses those rights
+        castling = self.castling & CASTLING_MASKS[from_sq] & CASTLING_MASKS[to_sq]
+        if castling != self.castling:
+            self.hash ^= CASTLING_MASK_KEYS[self.castling ^ castling]
+            self.castling = castling
 
         # Update move counters and side to move
-        if piece == PAWN or self.board[to_sq] != EMPTY:
+        if piece == PAWN or captured != EMPTY:
             self.halfmove_clock = 0
         else:
             self.halfmove_clock += 1
@@ -76,60 +400,200 @@ class Board:
             self.fullmove_number += 1
 
         self.side_to_move = 1 - self.side_to_move
+        self.hash ^= SIDE_KEY
         return True
 
-    def handle_castling(self, from_sq: int, to_sq: int):
-        # Handle castling moves
-        if abs(to_sq - from_sq) == 2:
+    def unmake_move(self):
+        (move, piece, captured, captured_sq, ep_square, castling,
+         halfmove_clock, key) = self.undo_stack.pop()
+        from_sq = move & MOVE_SQUARE_MASK
+        to_sq = move >> 7 & MOVE_SQUARE_MASK
+
+        self.side_to_move = 1 - self.side_to_move
+        if self.side_to_move == BLACK:
+            self.fullmove_number -= 1
+        side = self.color[to_sq]
+
+        # Put the moving piece back (undoing any promotion)
+        if move & MOVE_PROMOTION_MASK:
+            self.remove_piece(to_sq)
+            self.add_piece(from_sq, piece, side)
+        else:
+            self.move_piece(to_sq, from_sq)
+
+        if captured != EMPTY:
+            self.add_piece(captured_sq, captured, 1 - side)
+
+        if move & MOVE_CASTLE:
             rook_from = from_sq + 3 if to_sq > from_sq else from_sq - 4
             rook_to = (from_sq + to_sq) // 2
-            self.board[rook_to] = ROOK
-            self.board[rook_from] = EMPTY
-            self.color[rook_to] = self.color[to_sq]
-            self.color[rook_from] = EMPTY
-
-        # Update castling rights
-        side = self.side_to_move
-        self.castling_rights[side] = (False, False)
-
-    def handle_pawn_move(self, from_sq: int, to_sq: int, promotion: int):
-        # Handle en passant captures
-        if self.ep_square and to_sq == self.ep_square:
-            captured_sq = to_sq + (10 if self.side_to_move == WHITE else -10)
-            self.board[captured_sq] = EMPTY
-            self.color[captured_sq] = EMPTY
+            self.move_piece(rook_to, rook_from)
+
+        self.ep_square = ep_square
+        self.castling = castling
+        self.halfmove_clock = halfmove_clock
+        self.hash = key
 
+    @property
+    def castling_rights(self) -> dict:
+        # {color: (kingside, queenside)} view of the castling bitmask
+        return {color: (bool(self.castling & kingside), bool(self.castling & queenside))
+                for color, (kingside, queenside) in enumerate(CASTLING_BITS)}
+
+    @castling_rights.setter
+    def castling_rights(self, rights: dict):
+        for color, allowed in rights.items():
+            self.set_castling_rights(color, allowed)
+
+    def set_castling_rights(self, color: int, rights: Tuple[bool, bool]):
+        castling = self.castling
+        for bit, allowed in zip(CASTLING_BITS[color], rights):
+            castling = castling | bit if allowed else castling & ~bit
+        self.hash ^= CASTLING_MASK_KEYS[self.castling ^ castling]
+        self.castling = castling
+
+    def handle_castling(self, move: int):
+        # Castling rights are dropped in make_move; this moves the rook
+        if move & MOVE_CASTLE:
+            from_sq = move & MOVE_SQUARE_MASK
+            to_sq = move >> 7 & MOVE_SQUARE_MASK
+            rook_from = from_sq + 3 if to_sq > from_sq else from_sq - 4
+            rook_to = (from_sq + to_sq) // 2
+            self.move_piece(rook_from, rook_to)
+
+    def handle_pawn_move(self, move: int):
         # Set en passant square for double pawn moves
-        if abs(to_sq - from_sq) == 20:
-            self.ep_square = (from_sq + to_sq) // 2
+        if move & MOVE_DOUBLE_PUSH:
+            self.ep_square = ((move & MOVE_SQUARE_MASK) + (move >> 7 & MOVE_SQUARE_MASK)) // 2
+            self.hash ^= EP_KEYS[self.ep_square]
         else:
             self.ep_square = None
 
+    @classmethod
+    def from_fen(cls, fen: str) -> 'Board':
+        # Skips setting up the initial position that set_fen would overwrite
+        board = cls.__new__(cls)
+        board.set_fen(fen)
+        board.movegen = board.create_movegen()
+        return board
+
+    def set_fen(self, fen: str):
+        # One pass over the placement fills the mailbox together with the piece
+        # lists, material, piece-square sums and both Zobrist keys; the board
+        # is left untouched if the FEN is malformed
+        fields = fen.split()
+        if not fields:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        side = fields[1] if len(fields) > 1 else 'w'
+        castling = fields[2] if len(fields) > 2 else '-'
+        ep = fields[3] if len(fields) > 3 else '-'
+
+        board = EMPTY_MAILBOX[:]
+        color = array('b', bytes(120))
+        piece_lists = {c: {piece: [] for piece in range(PAWN, KING + 1)} for c in (WHITE, BLACK)}
+        material = [0, 0]
+        pst_score = [0, 0]
+        key = pawn_key = 0
+        rank_start = sq = 21
+        try:
+            if side not in ('w', 'b'):
+                raise ValueError
+            for char in fields[0]:
+                if char == '/':
+                    if sq != rank_start + 8:
+                        raise ValueError
+                    rank_start += 10
+                    sq = rank_start
+                elif char in '12345678':
+                    sq += ord(char) - 48
+                else:
+                    piece, side_color, value, pst, keys = _FEN_ENTRIES[char]
+                    if board[sq] != EMPTY:
+                        raise ValueError  # ran past the end of the rank
+                    board[sq] = piece
+                    color[sq] = side_color
+                    piece_lists[side_color][piece].append(sq)
+                    material[side_color] += value
+                    pst_score[side_color] += pst[sq]
+                    key ^= keys[sq]
+                    if piece == PAWN:
+                        pawn_key ^= keys[sq]
+                    sq += 1
+            if rank_start != 91 or sq != 99:
+                raise ValueError
+            rights = 0
+            for char in castling:
+                if char != '-':
+                    rights |= CASTLING_CHARS[char]
+            ep_square = parse_square(ep) if ep != '-' else None
+            halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+            fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        except (ValueError, KeyError, IndexError):
+            raise ValueError(f"Invalid FEN: {fen!r}") from None
+
+        self.board = board
+        self.color = color
+        self.piece_lists = piece_lists
+        self.material = material
+        self.pst_score = pst_score
+        self.side_to_move = BLACK if side == 'b' else WHITE
+        self.castling = rights
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+        self.undo_stack = []
+
+        if self.side_to_move == BLACK:
+            key ^= SIDE_KEY
+        key ^= CASTLING_MASK_KEYS[rights]
+        if ep_square:
+            key ^= EP_KEYS[ep_square]
+        self.hash = key
+        self.pawn_hash = pawn_key
+
+    def parse_move(self, uci: str) -> int:
+        promotion = "pnbrqk".index(uci[4].lower()) + 1 if len(uci) > 4 else 0
+        return self.pack_move((parse_square(uci[:2]), parse_square(uci[2:4]), promotion))
+
+    def pack_move(self, move: Tuple[int, int, int]) -> int:
+        # Packs a (from, to, promotion) move for this position, reading its
+        # flags off the board
+        from_sq, to_sq, promotion = move
+        piece = self.board[from_sq]
+        flags = MOVE_CAPTURE if self.board[to_sq] > EMPTY else 0
+        if piece == PAWN:
+            if abs(to_sq - from_sq) == 20:
+                flags |= MOVE_DOUBLE_PUSH
+            elif (to_sq == self.ep_square and self.board[to_sq] == EMPTY
+                    and (to_sq - from_sq) % 10 != 0):
+                flags |= MOVE_EN_PASSANT
+        elif piece == KING and abs(to_sq - from_sq) == 2:
+            flags |= MOVE_CASTLE
+        return encode_move(from_sq, to_sq, promotion, flags)
+
     def get_fen(self) -> str:
-        # Generate FEN string for current position
-        fen = []
-        empty = 0
-        
-        for rank in range(8):
-            for file in range(8):
-                sq = 21 + file + rank * 10
-                piece = self.board[sq]
-                
+        # Full six-field FEN
+        board = self.board
+        color = self.color
+        rows = []
+        for rank_start in range(21, 92, 10):
+            row = ''
+            empty = 0
+            for sq in range(rank_start, rank_start + 8):
+                piece = board[sq]
                 if piece == EMPTY:
                     empty += 1
-                else:
-                    if empty > 0:
-                        fen.append(str(empty))
-                        empty = 0
-                    piece_char = "PNBRQK"[piece - 1]
-                    if self.color[sq] == BLACK:
-                        piece_char = piece_char.lower()
-                    fen.append(piece_char)
-                    
-            if empty > 0:
-                fen.append(str(empty))
-                empty = 0
-            if rank < 7:
-                fen.append('/')
-                
-        return ''.join(fen)
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += PIECE_CHARS[color[sq]][piece]
+            if empty:
+                row += str(empty)
+            rows.append(row)
+
+        castling = ''.join(char for char, bit in CASTLING_CHARS.items()
+                           if self.castling & bit) or '-'
+        ep = square_name(self.ep_square) if self.ep_square else '-'
+        return (f"{'/'.join(rows)} {'w' if self.side_to_move == WHITE else 'b'} "
+                f"{castling} {ep} {self.halfmove_clock} {self.fullmove_number}")
@@ -0,0 +1,260 @@
+import argparse
+import heapq
+import mmap
+import os
+import random
+import struct
+import tempfile
+from typing import BinaryIO, Iterator, List, Optional, TextIO, Tuple
+from chess.polyglot import POLYGLOT_RANDOM_ARRAY
+from .board import square_name
+from .constants import *
+
+# Polyglot opening books: 16-byte big-endian entries (key, move, weight,
+# learn) sorted by key, where key is the Polyglot Zobrist hash of the
+# position. The engine's own Zobrist keys are random, so probing hashes the
+# board a second time with the standard Polyglot numbers.
+
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+RUN_ENTRY = struct.Struct(">QHII")  # Builder runs: key, move, weight, games
+MAX_WEIGHT = 0xFFFF
+
+# Polyglot numbers per mailbox square: POLYGLOT_PIECE_KEYS[color][piece][sq]
+POLYGLOT_PIECE_KEYS = [[[0] * 120 for _ in range(KING + 1)] for _ in (WHITE, BLACK)]
+for _color in (WHITE, BLACK):
+    for _piece in range(PAWN, KING + 1):
+        _kind = 2 * (_piece - 1) + (_color == WHITE)
+        for _sq in range(21, 99):
+            if 1 <= _sq % 10 <= 8:
+                _file, _rank = _sq % 10 - 1, 9 - _sq // 10
+                POLYGLOT_PIECE_KEYS[_color][_piece][_sq] = \
+                    POLYGLOT_RANDOM_ARRAY[64 * _kind + 8 * _rank + _file]
+# Castling bits line up with Polyglot's order: K, Q, k, q
+POLYGLOT_CASTLING_KEYS = [0] * (ALL_CASTLING + 1)
+for _rights in range(ALL_CASTLING + 1):
+    for _bit in range(4):
+        if _rights >> _bit & 1:
+            POLYGLOT_CASTLING_KEYS[_rights] ^= POLYGLOT_RANDOM_ARRAY[768 + _bit]
+POLYGLOT_EP_KEYS = POLYGLOT_RANDOM_ARRAY[772:780]
+POLYGLOT_TURN_KEY = POLYGLOT_RANDOM_ARRAY[780]
+
+
+def polyglot_key(board) -> int:
+    key = POLYGLOT_CASTLING_KEYS[board.castling]
+    for color in (WHITE, BLACK):
+        for piece, squares in board.piece_lists[color].items():
+            keys = POLYGLOT_PIECE_KEYS[color][piece]
+            for sq in squares:
+                key ^= keys[sq]
+    side = board.side_to_move
+    ep = board.ep_square
+    if ep:
+        # Only hashed when a pawn stands ready to capture, legal or not
+        behind = ep + 10 if side == WHITE else ep - 10
+        for sq in (behind - 1, behind + 1):
+            if board.board[sq] == PAWN and board.color[sq] == side:
+                key ^= POLYGLOT_EP_KEYS[ep % 10 - 1]
+                break
+    if side == WHITE:
+        key ^= POLYGLOT_TURN_KEY
+    return key
+
+
+def polyglot_move_to_uci(board, raw: int) -> str:
+    # Castling is stored as the king capturing its own rook
+    to_sq = 21 + (raw & 7) + (7 - (raw >> 3 & 7)) * 10
+    from_sq = 21 + (raw >> 6 & 7) + (7 - (raw >> 9 & 7)) * 10
+    if (board.board[from_sq] == KING and board.board[to_sq] == ROOK
+            and board.color[to_sq] == board.color[from_sq]):
+        to_sq = from_sq + 2 if to_sq > from_sq else from_sq - 2
+    promotion = raw >> 12 & 7
+    uci = square_name(from_sq) + square_name(to_sq)
+    return uci + " nbrq"[promotion] if promotion else uci
+
+
+class OpeningBook:
+    """A Polyglot book probed in place: the file is memory-mapped and
+    binary-searched by key, so opening even a large book costs nothing and
+    only the pages a probe touches are read."""
+
+    def __init__(self, path: str, mode: str = "weighted", rng: random.Random = None):
+        # mode: "weighted" picks moves in proportion to their weights, "best"
+        # always plays the heaviest
+        self.path = path
+        self.mode = mode
+        self.rng = rng or random.Random()
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.size = size // ENTRY.size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def entries(self, key: int) -> Iterator[Tuple[int, int]]:
+        # (raw move, weight) of every entry for key
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY.unpack_from(self.data, mid * ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.size:
+            entry_key, raw, weight, _ = ENTRY.unpack_from(self.data, lo * ENTRY.size)
+            if entry_key != key:
+                break
+            yield raw, weight
+            lo += 1
+
+    def moves(self, board) -> List[Tuple[int, int]]:
+        # (move, weight) for the book's legal moves in this position; a key
+        # collision can't smuggle in an illegal move
+        found = []
+        legal = None
+        for raw, weight in self.entries(polyglot_key(board)):
+            if legal is None:
+                legal = board.movegen.generate_moves()
+            try:
+                move = board.parse_move(polyglot_move_to_uci(board, raw))
+            except (ValueError, IndexError):
+                continue
+            if move in legal:
+                found.append((move, weight))
+        return found
+
+    def choose(self, board) -> Optional[int]:
+        moves = [(move, weight) for move, weight in self.moves(board) if weight > 0]
+        if not moves:
+            return None
+        if self.mode == "best":
+            return max(moves, key=lambda item: item[1])[0]
+        return self.rng.choices([move for move, _ in moves],
+                                weights=[weight for _, weight in moves])[0]
+
+
+def game_entries(game, max_ply: int) -> Iterator[Tuple[int, int, int]]:
+    # (key, raw move, weight) for the first max_ply moves of a python-chess
+    # game: 2 for a move by the eventual winner, 0 for the loser, 1 otherwise
+    import chess
+    import chess.polyglot
+    result = game.headers.get("Result", "*")
+    scores = {"1-0": (2, 0), "0-1": (0, 2)}.get(result, (1, 1))
+    board = game.board()
+    for ply, move in enumerate(game.mainline_moves()):
+        if ply >= max_ply:
+            break
+        to_sq = move.to_square
+        if board.is_castling(move):
+            to_sq = chess.square(7 if chess.square_file(to_sq) > 4 else 0,
+                                 chess.square_rank(to_sq))
+        raw = (chess.square_file(to_sq) | chess.square_rank(to_sq) << 3 |
+               chess.square_file(move.from_square) << 6 |
+               chess.square_rank(move.from_square) << 9 |
+               (move.promotion - 1 if move.promotion else 0) << 12)
+        yield chess.polyglot.zobrist_hash(board), raw, scores[board.turn == chess.BLACK]
+        board.push(move)
+
+
+def write_run(counts: dict) -> BinaryIO:
+    run = tempfile.TemporaryFile()
+    for (key, raw), (weight, games) in sorted(counts.items()):
+        run.write(RUN_ENTRY.pack(key, raw, weight, games))
+    run.seek(0)
+    return run
+
+
+def read_run(run: BinaryIO) -> Iterator[Tuple[int, int, int, int]]:
+    while True:
+        chunk = run.read(RUN_ENTRY.size * 4096)
+        if not chunk:
+            return
+        yield from RUN_ENTRY.iter_unpack(chunk)
+
+
+def build_book(pgn: TextIO, output: BinaryIO, max_ply: int = 20, min_games: int = 1,
+               run_entries: int = 1000000) -> int:
+    # Streams games from pgn into a Polyglot book written to output and
+    # returns the number of entries. Memory is bounded by run_entries:
+    # counts spill to sorted temporary runs that are merged at the end.
+    import chess.pgn
+    counts = {}
+    runs = []
+    while True:
+        game = chess.pgn.read_game(pgn)
+        if game is None:
+            break
+        for key, raw, weight in game_entries(game, max_ply):
+            total = counts.get((key, raw))
+            counts[(key, raw)] = (total[0] + weight, total[1] + 1) if total else (weight, 1)
+        if len(counts) >= run_entries:
+            runs.append(write_run(counts))
+            counts = {}
+    if counts or not runs:
+        runs.append(write_run(counts))
+
+    written = 0
+    position = []  # Merged (raw, weight, games) of the key being collected
+    current = None
+    try:
+        for key, raw, weight, games in heapq.merge(*(read_run(run) for run in runs)):
+            if key != current:
+                written += write_position(output, current, position, min_games)
+                current, position = key, []
+            if position and position[-1][0] == raw:
+                _, total, count = position[-1]
+                position[-1] = (raw, total + weight, count + games)
+            else:
+                position.append((raw, weight, games))
+        written += write_position(output, current, position, min_games)
+    finally:
+        for run in runs:
+            run.close()
+    return written
+
+
+def write_position(output: BinaryIO, key: int, position: list, min_games: int) -> int:
+    # Heaviest move first, weights scaled into 16 bits
+    moves = [(weight, raw) for raw, weight, games in position if games >= min_games]
+    if not moves:
+        return 0
+    top = max(weight for weight, _ in moves)
+    scale = MAX_WEIGHT / top if top > MAX_WEIGHT else 1
+    moves.sort(reverse=True)
+    for weight, raw in moves:
+        weight = max(1, int(weight * scale)) if weight else 0
+        output.write(ENTRY.pack(key, raw, weight, 0))
+    return len(moves)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Polyglot opening book from a PGN file")
+    parser.add_argument("pgn", help="PGN file to read games from")
+    parser.add_argument("output", help="Polyglot .bin file to write")
+    parser.add_argument("--max-ply", type=int, default=20, help="plies taken from each game")
+    parser.add_argument("--min-games", type=int, default=1,
+                        help="drop moves played in fewer games")
+    parser.add_argument("--run-entries", type=int, default=1000000,
+                        help="distinct moves held in memory before spilling a sorted run")
+    args = parser.parse_args()
+
+    with open(args.pgn, encoding="utf-8", errors="replace") as pgn, \
+            open(args.output, "wb") as output:
+        count = build_book(pgn, output, args.max_ply, args.min_games, args.run_entries)
+    print(f"{count} entries written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
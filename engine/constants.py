@@ -76,6 +76,13 @@ PIECE_SQUARE_TABLES = {
 }
 
 # Material values
+# Mate scores count plies from the root: being mated n plies from it scores
+# -(MATE_SCORE - n). Anything beyond MATE_BOUND is a mate; INFINITY bounds
+# every search window.
+MATE_SCORE = 20000
+MATE_BOUND = MATE_SCORE - 1000
+INFINITY = MATE_SCORE + 1
+
 PIECE_VALUES = {
     PAWN: 100,
     KNIGHT: 320,
@@ -84,3 +91,57 @@ PIECE_VALUES = {
     QUEEN: 900,
     KING: 20000
 }
+
+# Pawn structure terms
+DOUBLED_PAWN_PENALTY = 10
+ISOLATED_PAWN_PENALTY = 15
+BACKWARD_PAWN_PENALTY = 8
+# Passed pawn bonus by rank counted from the pawn's own back rank
+PASSED_PAWN_BONUS = [0, 5, 10, 20, 35, 60, 100, 0]
+
+# Piece-square bonuses indexed directly by mailbox square:
+# PST_MAILBOX[color][piece][square], with the same table lookup as
+# Evaluator.evaluate_position so incremental and full scores agree
+PST_MAILBOX = [[[0] * 120 for _ in range(7)] for _ in (WHITE, BLACK)]
+for _color in (WHITE, BLACK):
+    for _piece, _table in PIECE_SQUARE_TABLES.items():
+        for _sq in range(21, 99):
+            _pst_sq = _sq - 21
+            if 0 <= _pst_sq < 64:
+                if _color == WHITE:
+                    _pst_sq = 63 - _pst_sq
+                PST_MAILBOX[_color][_piece][_sq] = _table[_pst_sq]
+
+# Castling rights bitmask; CASTLING_BITS[color] is (kingside, queenside)
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING = 15
+CASTLING_BITS = [(WHITE_KINGSIDE, WHITE_QUEENSIDE), (BLACK_KINGSIDE, BLACK_QUEENSIDE)]
+
+# Rights that survive a move from or to each square: the king and rook
+# home squares clear theirs
+CASTLING_MASKS = [ALL_CASTLING] * 120
+CASTLING_MASKS[95] ^= WHITE_KINGSIDE | WHITE_QUEENSIDE
+CASTLING_MASKS[98] ^= WHITE_KINGSIDE
+CASTLING_MASKS[91] ^= WHITE_QUEENSIDE
+CASTLING_MASKS[25] ^= BLACK_KINGSIDE | BLACK_QUEENSIDE
+CASTLING_MASKS[28] ^= BLACK_KINGSIDE
+CASTLING_MASKS[21] ^= BLACK_QUEENSIDE
+
+# Packed moves: from | to << 7 | promotion << 14 | flags, in one int
+MOVE_SQUARE_MASK = 0x7F
+MOVE_FROM_TO_MASK = (1 << 14) - 1  # Indexes the history table
+MOVE_PROMOTION_MASK = 0x7 << 14
+MOVE_CAPTURE = 1 << 17
+MOVE_EN_PASSANT = 1 << 18
+MOVE_CASTLE = 1 << 19
+MOVE_DOUBLE_PUSH = 1 << 20
+MOVE_TACTICAL = MOVE_CAPTURE | MOVE_EN_PASSANT | MOVE_PROMOTION_MASK
+
+# Mailbox move offsets
+KNIGHT_OFFSETS = (-21, -19, -12, -8, 8, 12, 19, 21)
+KING_OFFSETS = (-11, -10, -9, -1, 1, 9, 10, 11)
+ROOK_DIRECTIONS = (-10, -1, 1, 10)
+BISHOP_DIRECTIONS = (-11, -9, 9, 11)
@@ -1,17 +1,64 @@
+from array import array
 from .constants import *
 
 class Evaluator:
-    def __init__(self):
+    __slots__ = ('pst', 'piece_values', 'cache_mask', 'cache_keys', 'cache_scores',
+                 'cache_hits', 'cache_misses', 'pawn_mask', 'pawn_keys', 'pawn_scores',
+                 'pawn_hits', 'pawn_misses')
+
+    def __init__(self, cache_size: int = 1 << 16, pawn_cache_size: int = 1 << 14):
         self.pst = PIECE_SQUARE_TABLES
         self.piece_values = PIECE_VALUES
+        self.resize_cache(cache_size)
+        self.resize_pawn_cache(pawn_cache_size)
+
+    def resize_pawn_cache(self, cache_size: int):
+        # Pawn structure scores keyed by Board.pawn_hash; the structure changes
+        # on few moves, so this hits far more often than the full cache
+        size = 1 << (max(cache_size, 1).bit_length() - 1)
+        self.pawn_mask = size - 1
+        self.pawn_keys = array('Q', bytes(8 * size))
+        self.pawn_scores = array('i', bytes(4 * size))
+        self.pawn_hits = 0
+        self.pawn_misses = 0
+
+    def resize_cache(self, cache_size: int):
+        # Direct-mapped cache of final scores keyed by the board's Zobrist
+        # hash; cache_size is rounded down to a power of two, 0 disables it
+        size = 1 << (cache_size.bit_length() - 1) if cache_size > 0 else 0
+        self.cache_mask = size - 1
+        self.cache_keys = array('Q', bytes(8 * size))
+        self.cache_scores = array('i', bytes(4 * size))
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def clear_cache(self):
+        self.resize_cache(len(self.cache_keys))
         
     def evaluate(self, board) -> int:
+        key = board.hash
+        if self.cache_mask >= 0 and key:
+            index = key & self.cache_mask
+            if self.cache_keys[index] == key:
+                self.cache_hits += 1
+                return self.cache_scores[index]
+            self.cache_misses += 1
+            score = self.evaluate_uncached(board)
+            self.cache_keys[index] = key
+            self.cache_scores[index] = score
+            return score
+        return self.evaluate_uncached(board)
+
+    def evaluate_uncached(self, board) -> int:
         score = 0
         
         # Material and piece-square table evaluation
         score += self.evaluate_material(board)
         score += self.evaluate_position(board)
         
+        # Pawn structure
+        score += self.evaluate_pawn_structure(board)
+
         # Mobility
         score += self.evaluate_mobility(board)
         
@@ -22,55 +69,75 @@ class Evaluator:
         return score if board.side_to_move == WHITE else -score
         
     def evaluate_material(self, board) -> int:
-        score = 0
-        for sq in range(21, 99):
-            piece = board.board[sq]
-            if piece != EMPTY and piece != -1:  # Skip empty and border squares
-                value = self.piece_values[piece]
-                if board.color[sq] == BLACK:
-                    value = -value
-                score += value
-        return score
+        # Board keeps per-color material sums up to date in make/unmake
+        return board.material[WHITE] - board.material[BLACK]
         
     def evaluate_position(self, board) -> int:
+        # Piece-square sums are maintained incrementally alongside material
+        return board.pst_score[WHITE] - board.pst_score[BLACK]
+        
+    def evaluate_pawn_structure(self, board) -> int:
+        key = board.pawn_hash
+        index = key & self.pawn_mask
+        if self.pawn_keys[index] == key:
+            self.pawn_hits += 1
+            return self.pawn_scores[index]
+        self.pawn_misses += 1
+        score = self.compute_pawn_structure(board)
+        self.pawn_keys[index] = key
+        self.pawn_scores[index] = score
+        return score
+
+    def compute_pawn_structure(self, board) -> int:
+        # Doubled, isolated, backward and passed pawns, from white's perspective
+        pawns = board.piece_lists
+        # Rows (0 = eighth rank) of each color's pawns per file, with empty guard files
+        files = [[[] for _ in range(10)] for _ in (WHITE, BLACK)]
+        for color in (WHITE, BLACK):
+            for sq in pawns[color][PAWN]:
+                files[color][sq % 10].append(sq // 10 - 2)
+
         score = 0
-        for sq in range(21, 99):
-            piece = board.board[sq]
-            if piece != EMPTY and piece != -1:  # Skip empty and border squares
-                pst_sq = sq - 21
-                if 0 <= pst_sq < 64:  # Add bounds check
-                    if board.color[sq] == WHITE:
-                        pst_sq = 63 - pst_sq
-                    if piece in self.pst:  # Check if piece has pst table
-                        value = self.pst[piece][pst_sq]
-                        if board.color[sq] == BLACK:
-                            value = -value
-                        score += value
+        for color in (WHITE, BLACK):
+            own = files[color]
+            enemy = files[1 - color]
+            forward = -1 if color == WHITE else 1
+            value = 0
+            for file in range(1, 9):
+                rows = own[file]
+                if not rows:
+                    continue
+                value -= DOUBLED_PAWN_PENALTY * (len(rows) - 1)
+                neighbours = own[file - 1] + own[file + 1]
+                for row in rows:
+                    if not neighbours:
+                        value -= ISOLATED_PAWN_PENALTY
+                    elif all((r - row) * forward > 0 for r in neighbours):
+                        # Every neighbour has advanced past it and the stop
+                        # square is covered by an enemy pawn
+                        stop = row + forward
+                        if any(r == stop + forward for r in enemy[file - 1] + enemy[file + 1]):
+                            value -= BACKWARD_PAWN_PENALTY
+
+                    # Passed: no enemy pawn ahead on this or an adjacent file
+                    if not any((r - row) * forward > 0
+                               for r in enemy[file - 1] + enemy[file] + enemy[file + 1]):
+                        relative_rank = 7 - row if color == WHITE else row
+                        value += PASSED_PAWN_BONUS[relative_rank]
+            score += value if color == WHITE else -value
         return score
-        
+
     def evaluate_mobility(self, board) -> int:
-        from .movegen import MoveGenerator
-        mg = MoveGenerator(board)
-        mobility = len(mg.generate_moves())
-        
-        # Switch sides to count opponent's moves
-        board.side_to_move = 1 - board.side_to_move
-        opp_mobility = len(mg.generate_moves())
-        board.side_to_move = 1 - board.side_to_move
-        
-        return (mobility - opp_mobility) * 10
+        # One pass over each side's pieces counting attacked squares; the
+        # board's side to move is left alone
+        return (board.count_mobility(WHITE) - board.count_mobility(BLACK)) * 10
         
     def evaluate_king_safety(self, board) -> int:
         score = 0
         
         # Find kings
-        white_king = black_king = None
-        for sq in range(21, 99):
-            if board.board[sq] == KING:
-                if board.color[sq] == WHITE:
-                    white_king = sq
-                else:
-                    black_king = sq
+        white_king = board.king_square(WHITE)
+        black_king = board.king_square(BLACK)
                     
         # Evaluate pawn shield
         score += self.evaluate_pawn_shield(board, white_king, WHITE)
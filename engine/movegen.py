@@ -2,17 +2,297 @@ from typing import List, Tuple
 from .constants import *
 
 class MoveGenerator:
+    __slots__ = ('board', 'moves')
+
     def __init__(self, board):
         self.board = board
         self.moves = []
         
-    def generate_moves(self) -> List[Tuple[int, int, int]]:
+    def generate_moves(self) -> List[int]:
+        return self.generate_legal(self.generate_pseudo_legal_moves)
+
+    def generate_captures(self) -> List[int]:
+        # Legal captures, en passant and promotions only (quiescence, staged picking)
+        return self.generate_legal(self.generate_pseudo_captures, True)
+
+    def generate_quiets(self) -> List[int]:
+        # Legal non-capturing, non-promoting moves, castling included
+        return self.generate_legal(self.generate_pseudo_quiets, False)
+
+    def generate_legal(self, generate_pseudo, tactical: bool = None) -> List[int]:
+        # Fully legal moves: evasions when in check, otherwise pseudo-legal
+        # moves filtered by pins and king safety
+        board = self.board
+        side = board.side_to_move
+        king_sq = board.king_square(side)
+        if king_sq is None:
+            return generate_pseudo()
+
+        checkers, evasion_squares = self.find_checkers(king_sq, side)
+        if checkers:
+            evasions = self.generate_evasions(king_sq, checkers, evasion_squares)
+            if tactical is not None:
+                evasions = [move for move in evasions if self.is_tactical(move) == tactical]
+                self.moves = evasions
+            return evasions
+
+        pins = self.find_pins(king_sq, side)
+        legal = []
+        for move in generate_pseudo():
+            from_sq = move & MOVE_SQUARE_MASK
+            to_sq = move >> 7 & MOVE_SQUARE_MASK
+            if from_sq == king_sq:
+                # Castling was already checked against attacked squares
+                if move & MOVE_CASTLE or not board.is_square_attacked(to_sq, 1 - side, king_sq):
+                    legal.append(move)
+            elif from_sq in pins and to_sq not in pins[from_sq]:
+                continue
+            elif move & MOVE_EN_PASSANT:
+                if self.is_legal_en_passant(move):
+                    legal.append(move)
+            else:
+                legal.append(move)
+
+        self.moves = legal
+        return legal
+
+    def is_tactical(self, move: int) -> bool:
+        # Captures (en passant included) and promotions
+        return bool(move & MOVE_TACTICAL)
+
+    def is_legal(self, move: int) -> bool:
+        # Cheap validation of a move from another position (hash move, killers):
+        # regenerate only the moving piece, then try it
+        board = self.board
+        from_sq = move & MOVE_SQUARE_MASK
+        side = board.side_to_move
+        if board.board[from_sq] <= EMPTY or board.color[from_sq] != side:
+            return False
+        saved = self.moves
+        self.moves = []
+        self.generate_piece_moves(from_sq)
+        found = move in self.moves
+        self.moves = saved
+        if not found:
+            return False
+        board.make_move(move)
+        legal = not board.in_check(side)
+        board.unmake_move()
+        return legal
+
+    def generate_pseudo_captures(self) -> List[int]:
+        self.moves = []
+        board = self.board.board
+        color = self.board.color
+        side = self.board.side_to_move
+        enemy = 1 - side
+        pieces = self.board.piece_lists[side]
+        direction = -10 if side == WHITE else 10
+        promotion_row = 2 if side == WHITE else 9
+
+        for sq in pieces[PAWN]:
+            for to_sq in (sq + direction - 1, sq + direction + 1):
+                if board[to_sq] > EMPTY and color[to_sq] == enemy:
+                    self.add_pawn_moves(sq, to_sq, MOVE_CAPTURE)
+                elif to_sq == self.board.ep_square and board[to_sq] == EMPTY:
+                    self.moves.append(sq | to_sq << 7 | MOVE_EN_PASSANT)
+            # Quiet promotions are searched with the captures
+            to_sq = sq + direction
+            if to_sq // 10 == promotion_row and board[to_sq] == EMPTY:
+                self.add_pawn_moves(sq, to_sq)
+
+        for piece, offsets in ((KNIGHT, KNIGHT_OFFSETS), (KING, KING_OFFSETS)):
+            for sq in pieces[piece]:
+                for offset in offsets:
+                    to_sq = sq + offset
+                    if board[to_sq] > EMPTY and color[to_sq] == enemy:
+                        self.moves.append(sq | to_sq << 7 | MOVE_CAPTURE)
+
+        for piece, directions in ((BISHOP, BISHOP_DIRECTIONS), (ROOK, ROOK_DIRECTIONS),
+                                  (QUEEN, KING_OFFSETS)):
+            for sq in pieces[piece]:
+                for direction in directions:
+                    to_sq = sq + direction
+                    while board[to_sq] == EMPTY:
+                        to_sq += direction
+                    if board[to_sq] > EMPTY and color[to_sq] == enemy:
+                        self.moves.append(sq | to_sq << 7 | MOVE_CAPTURE)
+
+        return self.moves
+
+    def generate_pseudo_quiets(self) -> List[int]:
         self.moves = []
+        board = self.board.board
         side = self.board.side_to_move
+        pieces = self.board.piece_lists[side]
+        direction = -10 if side == WHITE else 10
+        promotion_row = 2 if side == WHITE else 9
+        double_row = 8 if side == WHITE else 3
+
+        for sq in pieces[PAWN]:
+            to_sq = sq + direction
+            if board[to_sq] == EMPTY and to_sq // 10 != promotion_row:
+                self.moves.append(sq | to_sq << 7)
+                if sq // 10 == double_row and board[to_sq + direction] == EMPTY:
+                    self.moves.append(sq | (to_sq + direction) << 7 | MOVE_DOUBLE_PUSH)
+
+        for piece, offsets in ((KNIGHT, KNIGHT_OFFSETS), (KING, KING_OFFSETS)):
+            for sq in pieces[piece]:
+                for offset in offsets:
+                    if board[sq + offset] == EMPTY:
+                        self.moves.append(sq | (sq + offset) << 7)
+
+        for piece, directions in ((BISHOP, BISHOP_DIRECTIONS), (ROOK, ROOK_DIRECTIONS),
+                                  (QUEEN, KING_OFFSETS)):
+            for sq in pieces[piece]:
+                for direction in directions:
+                    to_sq = sq + direction
+                    while board[to_sq] == EMPTY:
+                        self.moves.append(sq | to_sq << 7)
+                        to_sq += direction
+
+        for sq in pieces[KING]:
+            self.generate_castling_moves(sq)
+
+        return self.moves
+
+    def generate_evasions(self, king_sq: int, checkers: List[int],
+                          evasion_squares: set) -> List[int]:
+        # Check evasions: king steps, and with a single checker, captures of
+        # the checker or interpositions on the checking ray
+        board = self.board
+        side = board.side_to_move
+        self.moves = []
+        self.generate_king_steps(king_sq)
+        legal = [move for move in self.moves
+                 if not board.is_square_attacked(move >> 7 & MOVE_SQUARE_MASK, 1 - side, king_sq)]
+        if len(checkers) > 1:
+            self.moves = legal
+            return legal
+
+        pins = self.find_pins(king_sq, side)
+        checker = checkers[0]
+        self.moves = []
+        pieces = board.piece_lists[side]
+        for sq in pieces[PAWN]:
+            self.generate_pawn_moves(sq)
+        for sq in pieces[KNIGHT]:
+            self.generate_knight_moves(sq)
+        for sq in pieces[BISHOP]:
+            self.generate_bishop_moves(sq)
+        for sq in pieces[ROOK]:
+            self.generate_rook_moves(sq)
+        for sq in pieces[QUEEN]:
+            self.generate_queen_moves(sq)
+
+        for move in self.moves:
+            from_sq = move & MOVE_SQUARE_MASK
+            to_sq = move >> 7 & MOVE_SQUARE_MASK
+            if from_sq in pins and to_sq not in pins[from_sq]:
+                continue
+            if move & MOVE_EN_PASSANT:
+                # The double-pushed pawn itself may be the checker
+                if ((to_sq in evasion_squares or to_sq + (10 if side == WHITE else -10) == checker)
+                        and self.is_legal_en_passant(move)):
+                    legal.append(move)
+            elif to_sq in evasion_squares:
+                legal.append(move)
+
+        self.moves = legal
+        return legal
+
+    def find_checkers(self, king_sq: int, side: int) -> Tuple[List[int], set]:
+        # Returns the checking pieces and the squares that capture or block them
+        board = self.board.board
+        color = self.board.color
+        enemy = 1 - side
+        checkers = []
+        evasion_squares = set()
+
+        pawn_squares = (king_sq - 9, king_sq - 11) if side == WHITE else (king_sq + 9, king_sq + 11)
+        for sq in pawn_squares:
+            if board[sq] == PAWN and color[sq] == enemy:
+                checkers.append(sq)
+        for offset in KNIGHT_OFFSETS:
+            sq = king_sq + offset
+            if board[sq] == KNIGHT and color[sq] == enemy:
+                checkers.append(sq)
+        evasion_squares.update(checkers)
+
+        for directions, slider in ((ROOK_DIRECTIONS, ROOK), (BISHOP_DIRECTIONS, BISHOP)):
+            for direction in directions:
+                path = []
+                sq = king_sq + direction
+                while board[sq] == EMPTY:
+                    path.append(sq)
+                    sq += direction
+                piece = board[sq]
+                if (piece == slider or piece == QUEEN) and color[sq] == enemy:
+                    checkers.append(sq)
+                    evasion_squares.add(sq)
+                    evasion_squares.update(path)
+
+        return checkers, evasion_squares
+
+    def find_pins(self, king_sq: int, side: int) -> dict:
+        # Maps each absolutely pinned piece to the squares it may still move to
+        board = self.board.board
+        color = self.board.color
+        enemy = 1 - side
+        pins = {}
+
+        for directions, slider in ((ROOK_DIRECTIONS, ROOK), (BISHOP_DIRECTIONS, BISHOP)):
+            for direction in directions:
+                ray = []
+                pinned = None
+                sq = king_sq + direction
+                while True:
+                    piece = board[sq]
+                    if piece == -1:
+                        break
+                    ray.append(sq)
+                    if piece != EMPTY:
+                        if color[sq] == side:
+                            if pinned is not None:
+                                break
+                            pinned = sq
+                        else:
+                            if pinned is not None and (piece == slider or piece == QUEEN):
+                                pins[pinned] = set(ray)
+                            break
+                    sq += direction
+
+        return pins
+
+    def is_en_passant(self, move: int) -> bool:
+        return bool(move & MOVE_EN_PASSANT)
+
+    def is_legal_en_passant(self, move: int) -> bool:
+        # Two pawns leave the capture rank at once, so just try it
+        board = self.board
+        side = board.side_to_move
+        board.make_move(move)
+        legal = not board.in_check(side)
+        board.unmake_move()
+        return legal
+
+    def generate_pseudo_legal_moves(self) -> List[int]:
+        self.moves = []
+        pieces = self.board.piece_lists[self.board.side_to_move]
         
-        for sq in range(21, 99):
-            if self.board.board[sq] != EMPTY and self.board.color[sq] == side:
-                self.generate_piece_moves(sq)
+        # Walk the piece lists instead of scanning every square
+        for sq in pieces[PAWN]:
+            self.generate_pawn_moves(sq)
+        for sq in pieces[KNIGHT]:
+            self.generate_knight_moves(sq)
+        for sq in pieces[BISHOP]:
+            self.generate_bishop_moves(sq)
+        for sq in pieces[ROOK]:
+            self.generate_rook_moves(sq)
+        for sq in pieces[QUEEN]:
+            self.generate_queen_moves(sq)
+        for sq in pieces[KING]:
+            self.generate_king_moves(sq)
                 
         return self.moves
         
@@ -44,34 +324,37 @@ class MoveGenerator:
                 (self.board.side_to_move == BLACK and 30 <= square <= 39)):
                 to_sq = square + 2 * direction
                 if self.board.board[to_sq] == EMPTY:
-                    self.moves.append((square, to_sq, 0))
+                    self.moves.append(square | to_sq << 7 | MOVE_DOUBLE_PUSH)
         
         # Captures
         for to_sq in [square + direction - 1, square + direction + 1]:
-            if (self.board.board[to_sq] != EMPTY and 
+            if (self.board.board[to_sq] > EMPTY and  # Skip empty and border squares
                 self.board.color[to_sq] != self.board.side_to_move):
-                self.add_pawn_moves(square, to_sq)
+                self.add_pawn_moves(square, to_sq, MOVE_CAPTURE)
                 
             # En passant captures
             if to_sq == self.board.ep_square:
-                self.moves.append((square, to_sq, 0))
+                self.moves.append(square | to_sq << 7 | MOVE_EN_PASSANT)
                 
-    def add_pawn_moves(self, from_sq: int, to_sq: int):
+    def add_pawn_moves(self, from_sq: int, to_sq: int, flags: int = 0):
+        move = from_sq | to_sq << 7 | flags
         # Handle promotions
         if (self.board.side_to_move == WHITE and 20 <= to_sq <= 29) or \
            (self.board.side_to_move == BLACK and 90 <= to_sq <= 99):
             for piece in [QUEEN, ROOK, BISHOP, KNIGHT]:
-                self.moves.append((from_sq, to_sq, piece))
+                self.moves.append(move | piece << 14)
         else:
-            self.moves.append((from_sq, to_sq, 0))
+            self.moves.append(move)
             
     def generate_knight_moves(self, square: int):
         offsets = [-21, -19, -12, -8, 8, 12, 19, 21]
         for offset in offsets:
             to_sq = square + offset
-            if (self.board.board[to_sq] == EMPTY or 
-                self.board.color[to_sq] != self.board.side_to_move):
-                self.moves.append((square, to_sq, 0))
+            target = self.board.board[to_sq]
+            if target == EMPTY:
+                self.moves.append(square | to_sq << 7)
+            elif target != -1 and self.board.color[to_sq] != self.board.side_to_move:
+                self.moves.append(square | to_sq << 7 | MOVE_CAPTURE)
                 
     def generate_sliding_moves(self, square: int, directions: List[int]):
         for direction in directions:
@@ -79,9 +362,9 @@ class MoveGenerator:
             # Change the condition to continue while square is valid
             while self.board.board[to_sq] != -1:  # Stop at border squares
                 if self.board.board[to_sq] == EMPTY:
-                    self.moves.append((square, to_sq, 0))
+                    self.moves.append(square | to_sq << 7)
                 elif self.board.color[to_sq] != self.board.side_to_move:
-                    self.moves.append((square, to_sq, 0))
+                    self.moves.append(square | to_sq << 7 | MOVE_CAPTURE)
                     break
                 else:
                     break
@@ -97,21 +380,43 @@ class MoveGenerator:
         self.generate_sliding_moves(square, [-11, -10, -9, -1, 1, 9, 10, 11])
         
     def generate_king_moves(self, square: int):
+        self.generate_king_steps(square)
+        self.generate_castling_moves(square)
+
+    def generate_king_steps(self, square: int):
         offsets = [-11, -10, -9, -1, 1, 9, 10, 11]
         for offset in offsets:
             to_sq = square + offset
-            if (self.board.board[to_sq] == EMPTY or 
-                self.board.color[to_sq] != self.board.side_to_move):
-                self.moves.append((square, to_sq, 0))
+            target = self.board.board[to_sq]
+            if target == EMPTY:
+                self.moves.append(square | to_sq << 7)
+            elif target != -1 and self.board.color[to_sq] != self.board.side_to_move:
+                self.moves.append(square | to_sq << 7 | MOVE_CAPTURE)
                 
-        # Castling
-        if self.board.castling_rights[self.board.side_to_move][0]:  # Kingside
-            if (self.board.board[square + 1] == EMPTY and 
-                self.board.board[square + 2] == EMPTY):
-                self.moves.append((square, square + 2, 0))
+    def generate_castling_moves(self, square: int):
+        # The king may not castle out of, through or into check
+        board = self.board.board
+        side = self.board.side_to_move
+        enemy = 1 - side
+        kingside, queenside = CASTLING_BITS[side]
+        kingside &= self.board.castling
+        queenside &= self.board.castling
+        if not (kingside or queenside):
+            return
+        if self.board.is_square_attacked(square, enemy):
+            return
+
+        if kingside:
+            if (board[square + 1] == EMPTY and board[square + 2] == EMPTY and
+                board[square + 3] == ROOK and self.board.color[square + 3] == side and
+                not self.board.is_square_attacked(square + 1, enemy) and
+                not self.board.is_square_attacked(square + 2, enemy)):
+                self.moves.append(square | (square + 2) << 7 | MOVE_CASTLE)
                 
-        if self.board.castling_rights[self.board.side_to_move][1]:  # Queenside
-            if (self.board.board[square - 1] == EMPTY and 
-                self.board.board[square - 2] == EMPTY and
-                self.board.board[square - 3] == EMPTY):
-                self.moves.append((square, square - 2, 0))
+        if queenside:
+            if (board[square - 1] == EMPTY and board[square - 2] == EMPTY and
+                board[square - 3] == EMPTY and
+                board[square - 4] == ROOK and self.board.color[square - 4] == side and
+                not self.board.is_square_attacked(square - 1, enemy) and
+                not self.board.is_square_attacked(square - 2, enemy)):
+                self.moves.append(square | (square - 2) << 7 | MOVE_CASTLE)
@@ -0,0 +1,69 @@
+from typing import Iterator, List
+from .constants import *
+
+Move = int  # Packed as in constants: from | to << 7 | promotion << 14 | flags
+
+
+class MovePicker:
+    """Yields moves lazily in stages: hash move, winning and even captures,
+    killers, quiets by history, then captures that lose material by SEE.
+
+    Each stage is only generated once the previous one is exhausted, so a
+    node that cuts off on the hash move never generates anything else.
+    """
+
+    __slots__ = ('movegen', 'board', 'history', 'tt_move', 'killers')
+
+    def __init__(self, movegen, history: List[int], tt_move: Move = None, killers=()):
+        self.movegen = movegen
+        self.board = movegen.board
+        self.history = history
+        self.tt_move = tt_move
+        self.killers = killers
+
+    def __iter__(self) -> Iterator[Move]:
+        movegen = self.movegen
+        tt_move = self.tt_move
+        if tt_move is not None:
+            if movegen.is_legal(tt_move):
+                yield tt_move
+            else:
+                tt_move = None
+
+        # Captures and promotions, most valuable victim / least valuable attacker first
+        captures = movegen.generate_captures()
+        captures.sort(key=self.capture_score, reverse=True)
+        bad_captures = []
+        for move in captures:
+            if move == tt_move:
+                continue
+            if self.board.see(move) < 0:
+                bad_captures.append(move)
+                continue
+            yield move
+
+        killers = []
+        for killer in self.killers:
+            if (killer is not None and killer != tt_move and
+                    not movegen.is_tactical(killer) and movegen.is_legal(killer)):
+                killers.append(killer)
+                yield killer
+
+        quiets = movegen.generate_quiets()
+        history = self.history
+        quiets.sort(key=lambda move: history[move & MOVE_FROM_TO_MASK], reverse=True)
+        for move in quiets:
+            if move != tt_move and move not in killers:
+                yield move
+
+        for move in bad_captures:
+            yield move
+
+    def capture_score(self, move: Move) -> int:
+        board = self.board.board
+        victim = board[move >> 7 & MOVE_SQUARE_MASK]
+        value = PIECE_VALUES[victim] if victim > EMPTY else PIECE_VALUES[PAWN]  # en passant
+        promotion = move >> 14 & 7
+        if promotion:
+            value += PIECE_VALUES[promotion] - PIECE_VALUES[PAWN]
+        return value * 10 - PIECE_VALUES[board[move & MOVE_SQUARE_MASK]] // 10
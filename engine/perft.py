@@ -0,0 +1,162 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+from .board import Board, START_FEN, move_to_uci
+from .bitboard import BitboardBoard
+
+BACKENDS = {'mailbox': Board, 'bitboard': BitboardBoard}
+
+# (name, fen, expected node counts for depth 1, 2, ...)
+STANDARD_POSITIONS = [
+    ("startpos", START_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("endgame-ep", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("castling-checks", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(board: Board, depth: int) -> int:
+    moves = board.movegen.generate_moves()
+    if depth <= 1:
+        # Bulk counting: leaf moves are counted, not made
+        return len(moves) if depth == 1 else 1
+
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def _perft_after(board: Board, move: int, depth: int) -> int:
+    board.make_move(move)
+    return perft(board, depth - 1)
+
+
+def divide(board: Board, depth: int, processes: int = 1) -> Dict[str, int]:
+    # Node count below each root move, keyed by UCI move
+    moves = list(board.movegen.generate_moves())
+    if processes > 1 and depth > 1:
+        # Each worker gets its own pickled copy of the board
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            counts = pool.map(_perft_after, [board] * len(moves), moves,
+                              [depth] * len(moves))
+            return {move_to_uci(move): count for move, count in zip(moves, counts)}
+
+    result = {}
+    for move in moves:
+        board.make_move(move)
+        result[move_to_uci(move)] = perft(board, depth - 1)
+        board.unmake_move()
+    return result
+
+
+def reference_divide(fen: str, depth: int) -> Dict[str, int]:
+    # python-chess as an independent oracle
+    import chess
+
+    def count(game, depth):
+        if depth <= 1:
+            return game.legal_moves.count() if depth == 1 else 1
+        nodes = 0
+        for move in game.legal_moves:
+            game.push(move)
+            nodes += count(game, depth - 1)
+            game.pop()
+        return nodes
+
+    game = chess.Board(fen)
+    result = {}
+    for move in list(game.legal_moves):
+        game.push(move)
+        result[move.uci()] = count(game, depth - 1)
+        game.pop()
+    return result
+
+
+def diff_divide(ours: Dict[str, int], reference: Dict[str, int]) -> List[str]:
+    lines = []
+    for move in sorted(set(ours) | set(reference)):
+        if ours.get(move) != reference.get(move):
+            lines.append(f"{move}: engine {ours.get(move, '-')} reference {reference.get(move, '-')}")
+    return lines
+
+
+def run_suite(positions, max_depth: int, backend: str = 'mailbox', processes: int = 1) -> bool:
+    ok = True
+    for name, fen, expected in positions:
+        board = BACKENDS[backend]()
+        board.set_fen(fen)
+        print(f"{name}: {fen}")
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            start = time.perf_counter()
+            if processes > 1:
+                nodes = sum(divide(board, depth, processes).values())
+            else:
+                nodes = perft(board, depth)
+            elapsed = time.perf_counter() - start
+            nps = int(nodes / elapsed) if elapsed > 0 else 0
+            status = "ok" if nodes == expected[depth - 1] else f"FAIL expected {expected[depth - 1]}"
+            print(f"  depth {depth}: {nodes:>10} nodes {elapsed:8.3f}s {nps:>9} nps  {status}")
+            if nodes != expected[depth - 1]:
+                ok = False
+                break
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft move generation test and benchmark")
+    parser.add_argument("--fen", help="position to test instead of the standard suite")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--divide", action="store_true",
+                        help="print per-move counts and diff them against python-chess")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default='mailbox')
+    parser.add_argument("--processes", type=int, default=1,
+                        help="spread root moves across worker processes")
+    args = parser.parse_args()
+
+    if args.divide:
+        fen = args.fen or START_FEN
+        board = BACKENDS[args.backend]()
+        board.set_fen(fen)
+        start = time.perf_counter()
+        ours = divide(board, args.depth, args.processes)
+        elapsed = time.perf_counter() - start
+        for move, count in sorted(ours.items()):
+            print(f"{move}: {count}")
+        total = sum(ours.values())
+        print(f"\nNodes: {total}  Time: {elapsed:.3f}s  NPS: {int(total / elapsed) if elapsed else 0}")
+
+        try:
+            mismatches = diff_divide(ours, reference_divide(fen, args.depth))
+        except ImportError:
+            print("python-chess not installed, skipping cross-check")
+            return
+        if mismatches:
+            print("Mismatches against python-chess:")
+            print("\n".join(mismatches))
+            raise SystemExit(1)
+        print("Matches python-chess")
+        return
+
+    positions = [("custom", args.fen, [])] if args.fen else STANDARD_POSITIONS
+    if args.fen:
+        # No known counts for an arbitrary position: take them from python-chess
+        positions = [("custom", args.fen,
+                      [sum(reference_divide(args.fen, d).values()) for d in range(1, args.depth + 1)])]
+    if not run_suite(positions, args.depth, args.backend, args.processes):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,154 +1,355 @@
+import threading
 from typing import Tuple, List
 from .evaluation import Evaluator
-from .movegen import MoveGenerator
-from .constants import EMPTY, PAWN, QUEEN, ROOK
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+from .timeman import TimeManager
+from .movepick import MovePicker
+from .bitbase import BITBASE_MATERIAL
+from .constants import (EMPTY, PAWN, WHITE, BLACK, PIECE_VALUES, MATE_SCORE,
+                        MATE_BOUND, INFINITY, MOVE_SQUARE_MASK, MOVE_FROM_TO_MASK,
+                        MOVE_EN_PASSANT)
+
+MAX_DEPTH = 64
+CHECK_INTERVAL = 1024  # Nodes between time/stop checks
+DELTA_MARGIN = 200  # Positional slack allowed on top of a capture's material gain
+ASPIRATION_DEPTH = 4  # First iteration searched in a window around the last score
+ASPIRATION_WINDOW = 50  # Initial half-width; doubles on every fail
+
+
+def score_to_tt(score: int, ply: int) -> int:
+    # Mate scores are stored counting from the entry's own node, so they stay
+    # right when the position is reached at another ply
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score: int, ply: int) -> int:
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class SearchAborted(Exception):
+    pass
+
 
 class SearchEngine:
-    def __init__(self, board):
+    __slots__ = ('board', 'evaluator', 'movegen', 'hash_mb', 'transposition_table',
+                 'shared_memory', 'threads', 'nodes', 'best_move', 'move_history', 'killers',
+                 'stop_event', 'info_callback', 'depth_reached', 'pv', 'max_depth',
+                 'node_limit', 'timer', 'root_undo', 'book', 'bitbases')
+
+    def __init__(self, board, hash_mb: int = 16, threads: int = 1,
+                 transposition_table: TranspositionTable = None, book=None, bitbases=None):
         self.board = board
         self.evaluator = Evaluator()
-        self.movegen = MoveGenerator(board)
-        self.transposition_table = {}
+        self.movegen = board.create_movegen()
+        self.hash_mb = hash_mb
+        self.transposition_table = transposition_table or TranspositionTable(hash_mb)
+        self.shared_memory = None  # Backs the table while helper processes share it
+        self.threads = 1
+        self.set_threads(threads)
         self.nodes = 0
         self.best_move = None
-        self.move_history = {}  # Store move history for move ordering
+        self.move_history = [0] * (MOVE_FROM_TO_MASK + 1)  # Indexed by a move's from/to bits
+        self.killers = [[None, None] for _ in range(MAX_DEPTH + 1)]  # Quiet cutoff moves per ply
+        self.stop_event = threading.Event()
+        self.info_callback = None  # Called with a dict after each completed iteration
+        self.depth_reached = 0
+        self.pv = []
+        self.book = book  # OpeningBook consulted before searching
+        self.bitbases = bitbases  # EndgameTables probed once material is low enough
         
-    def search(self, depth: int) -> Tuple[int, Tuple[int, int, int]]:
+    def set_threads(self, threads: int):
+        # With more than one thread the search runs helper processes (Lazy SMP),
+        # so the transposition table moves into shared memory
+        self.threads = max(1, threads)
+        if self.threads > 1 and self.shared_memory is None:
+            from .smp import create_shared_table
+            self.shared_memory, self.transposition_table = create_shared_table(self.hash_mb)
+
+    def set_hash(self, size_mb: int):
+        # Resizing empties the table; a shared one is recreated at the new size
+        self.hash_mb = size_mb
+        if self.shared_memory is not None:
+            self.close()
+            self.set_threads(self.threads)
+        else:
+            self.transposition_table.resize(size_mb)
+
+    def close(self):
+        # Free the shared transposition table, if any
+        if self.shared_memory is not None:
+            self.transposition_table.release()
+            self.shared_memory.close()
+            self.shared_memory.unlink()
+            self.shared_memory = None
+            self.transposition_table = TranspositionTable(self.hash_mb)
+
+    def search(self, depth: int = None, movetime: int = None, wtime: int = None,
+               btime: int = None, winc: int = 0, binc: int = 0, movestogo: int = None,
+               nodes: int = None, ponder: threading.Event = None) -> Tuple[int, int]:
+        # Iterative deepening under depth, node and time limits (times in ms).
+        # Returns the score and best move of the deepest completed iteration.
+        # With ponder the clock only starts once the event is set (ponder hit);
+        # stop() ends a ponder search that never gets one.
+        if self.book is not None:
+            move = self.book.choose(self.board)
+            if move is not None:
+                # Book moves are played without a search
+                self.nodes = self.depth_reached = 0
+                self.best_move = move
+                self.pv = [move]
+                return 0, move
+        limits = dict(depth=depth, movetime=movetime, wtime=wtime, btime=btime,
+                      winc=winc, binc=binc, movestogo=movestogo, nodes=nodes, ponder=ponder)
+        self.stop_event.clear()
+        if self.threads > 1:
+            from .smp import lazy_smp_search
+            return lazy_smp_search(self, limits)
+        return self.iterative_deepening(**limits)
+
+    def iterative_deepening(self, depth: int = None, movetime: int = None, wtime: int = None,
+                            btime: int = None, winc: int = 0, binc: int = 0,
+                            movestogo: int = None, nodes: int = None,
+                            start_depth: int = 1, ponder: threading.Event = None) -> Tuple[int, int]:
         self.nodes = 0
-        self.max_depth = depth
-        score = self.alpha_beta(depth, -float('inf'), float('inf'))
-        return score, self.best_move
+        self.node_limit = nodes
+        self.timer = TimeManager(self.board.side_to_move, movetime, wtime, btime,
+                                 winc, binc, movestogo, ponder)
+        self.transposition_table.new_search()
+        self.root_undo = len(self.board.undo_stack)
+        self.best_move = None
+        self.depth_reached = 0
+        self.pv = []
+        self.killers = [[None, None] for _ in range(MAX_DEPTH + 1)]
+
+        best_score, best_move = 0, None
+        for iteration in range(start_depth, (depth or MAX_DEPTH) + 1):
+            self.max_depth = iteration
+            try:
+                score = self.aspiration_search(iteration, best_score)
+            except SearchAborted:
+                # Unwind whatever the aborted iteration left on the board
+                while len(self.board.undo_stack) > self.root_undo:
+                    self.board.unmake_move()
+                break
+
+            best_score, best_move = score, self.best_move
+            self.depth_reached = iteration
+            self.pv = self.extract_pv(iteration)
+            if self.info_callback:
+                elapsed = self.timer.elapsed()
+                self.info_callback({
+                    'depth': iteration, 'score': score, 'nodes': self.nodes,
+                    'time': elapsed, 'nps': int(self.nodes / elapsed) if elapsed else 0,
+                    'pv': self.pv,
+                })
+
+            if best_move is None or self.stop_event.is_set() or not self.timer.can_start_iteration():
+                break
+            if self.node_limit and self.nodes >= self.node_limit:
+                break
+
+        self.best_move = best_move
+        return best_score, best_move
+
+    def aspiration_search(self, depth: int, guess: int) -> int:
+        # Searches a narrow window around the previous iteration's score. A
+        # fail returns a bound past the window (fail-soft), and the failing
+        # side moves out beyond it until the score lands inside.
+        if depth < ASPIRATION_DEPTH or abs(guess) >= MATE_BOUND:
+            return self.alpha_beta(depth, -INFINITY, INFINITY)
+        delta = ASPIRATION_WINDOW
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            score = self.alpha_beta(depth, alpha, beta)
+            if score <= alpha:
+                alpha = max(score - delta, -INFINITY)
+            elif score >= beta:
+                beta = min(score + delta, INFINITY)
+            else:
+                return score
+            delta *= 2
+
+    def stop(self):
+        # Safe to call from another thread; the search returns its last completed result
+        self.stop_event.set()
+
+    def check_limits(self):
+        # Depth 1 always completes so there is a move to play
+        if self.max_depth == 1:
+            return
+        if (self.stop_event.is_set() or self.timer.should_stop() or
+                (self.node_limit and self.nodes >= self.node_limit)):
+            raise SearchAborted()
+
+    def extract_pv(self, depth: int) -> List[int]:
+        # Follow stored best moves from the root
+        pv = []
+        seen = set()
+        while len(pv) < depth and self.board.hash not in seen:
+            seen.add(self.board.hash)
+            entry = self.transposition_table.probe(self.board.hash)
+            move = entry[3] if entry else None
+            if move is None or move not in self.movegen.generate_moves():
+                break
+            pv.append(move)
+            self.board.make_move(move)
+        for _ in pv:
+            self.board.unmake_move()
+        return pv
         
-    def alpha_beta(self, depth: int, alpha: float, beta: float) -> int:
+    def alpha_beta(self, depth: int, alpha: int, beta: int) -> int:
+        # Exact endgame results cut the whole subtree, leaves included; the
+        # root still searches so there is a move to play. Only here, never in
+        # the evaluator, so the mate distance can be made root-relative
+        board = self.board
+        if (self.bitbases is not None and depth != self.max_depth and
+                board.material[WHITE] + board.material[BLACK] <= BITBASE_MATERIAL):
+            score = self.bitbases.probe(board)
+            if score is not None:
+                self.nodes += 1
+                # Probed distances count from this node; make them count from the root
+                return score_from_tt(score, len(board.undo_stack) - self.root_undo)
+
         if depth == 0:
             return self.quiescence(alpha, beta)
             
         self.nodes += 1
-        
+        if self.nodes % CHECK_INTERVAL == 0:
+            self.check_limits()
+
         # Check transposition table
-        pos_key = self.board.get_fen()
-        if pos_key in self.transposition_table:
-            if self.transposition_table[pos_key]['depth'] >= depth:
-                return self.transposition_table[pos_key]['score']
-                
-        moves = self.movegen.generate_moves()
-        if not moves:
-            return -20000  # Checkmate
-            
-        # Move ordering with history heuristic
-        moves = self.order_moves(moves)
+        pos_key = self.board.hash
+        ply = len(self.board.undo_stack) - self.root_undo
+        alpha_orig = alpha
+        tt_move = None
+        entry = self.transposition_table.probe(pos_key)
+        if entry:
+            tt_score, tt_depth, tt_bound, tt_move = entry
+            tt_score = score_from_tt(tt_score, ply)
+            # Never cut at the root: the caller needs a best move from this search
+            if tt_depth >= depth and depth != self.max_depth:
+                if tt_bound == EXACT:
+                    return tt_score
+                if tt_bound == LOWER and tt_score >= beta:
+                    return tt_score
+                if tt_bound == UPPER and tt_score <= alpha:
+                    return tt_score
+
+        if depth == self.max_depth and tt_move is None:
+            tt_move = self.best_move  # Previous iteration's choice goes first
+        killers = self.killers[ply]
         
+        best_score = -INFINITY
         best_move = None
-        for move in moves:
+        legal_moves = 0
+        for move in MovePicker(self.movegen, self.move_history, tt_move, killers):
+            legal_moves += 1
+
             # Make move
-            old_state = self.make_move(move)
+            self.board.make_move(move)
             
-            # Recursive search
-            score = -self.alpha_beta(depth - 1, -beta, -alpha)
+            # Principal variation search: the first move gets the full window;
+            # the rest only have to be proven no better than it in a null
+            # window, and one that turns out better is searched again in full
+            if legal_moves == 1:
+                score = -self.alpha_beta(depth - 1, -beta, -alpha)
+            else:
+                score = -self.alpha_beta(depth - 1, -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    score = -self.alpha_beta(depth - 1, -beta, -alpha)
             
             # Unmake move
-            self.unmake_move(old_state)
+            self.board.unmake_move()
             
             if score >= beta:
-                # Update move history for beta cutoff
-                self.update_move_history(move, depth)
-                return beta
-                
+                # Quiet cutoff moves feed the killer and history heuristics
+                if not self.movegen.is_tactical(move):
+                    self.update_move_history(move, depth)
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                self.transposition_table.store(pos_key, depth, score_to_tt(score, ply), LOWER, move)
+                if depth == self.max_depth:
+                    self.best_move = move
+                return score
+
+            if score > best_score:
+                best_score = score
             if score > alpha:
                 alpha = score
                 best_move = move
                 # Update move history for best move
                 self.update_move_history(move, depth)
+
+        if not legal_moves:
+            # Moves are fully legal, so no moves is mate or stalemate
+            return ply - MATE_SCORE if self.board.in_check() else 0
                 
         # Store in transposition table
-        self.transposition_table[pos_key] = {
-            'score': alpha,
-            'depth': depth
-        }
+        bound = EXACT if best_score > alpha_orig else UPPER
+        self.transposition_table.store(pos_key, depth, score_to_tt(best_score, ply), bound, best_move)
         
-        if depth == self.max_depth:
+        # A root that failed low keeps the move it had for ordering the re-search
+        if depth == self.max_depth and best_move is not None:
             self.best_move = best_move
             
-        return alpha
+        return best_score
         
-    def quiescence(self, alpha: float, beta: float) -> int:
+    def quiescence(self, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self.check_limits()
+
         stand_pat = self.evaluator.evaluate(self.board)
         
         if stand_pat >= beta:
-            return beta
+            return stand_pat
             
         if alpha < stand_pat:
             alpha = stand_pat
+        best_score = stand_pat
             
-        moves = self.movegen.generate_moves()
-        moves = [m for m in moves if self.is_capture(m)]
-        moves = self.order_moves(moves)  # Order even capture moves
-        
-        for move in moves:
-            old_state = self.make_move(move)
+        # Skip captures that lose material, and those that cannot raise alpha
+        # even if the captured piece comes for free (delta pruning)
+        board = self.board
+        scored = []
+        for move in self.movegen.generate_captures():
+            victim = board.board[move >> 7 & MOVE_SQUARE_MASK]
+            gain = PIECE_VALUES[victim] if victim > EMPTY else 0
+            promotion = move >> 14 & 7
+            if promotion:
+                gain += PIECE_VALUES[promotion] - PIECE_VALUES[PAWN]
+            elif move & MOVE_EN_PASSANT:
+                gain = PIECE_VALUES[PAWN]
+            if stand_pat + gain + DELTA_MARGIN <= alpha:
+                continue
+            see = board.see(move)
+            if see < 0:
+                continue
+            scored.append((see, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        for _, move in scored:
+            board.make_move(move)
             score = -self.quiescence(-beta, -alpha)
-            self.unmake_move(old_state)
+            board.unmake_move()
             
             if score >= beta:
-                return beta
-            if score > alpha:
-                alpha = score
-                
-        return alpha
-        
-    def order_moves(self, moves: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
-        # Score moves based on multiple factors
-        move_scores = []
-        for move in moves:
-            score = 0
-            
-            # 1. Captures (MVV-LVA)
-            if self.is_capture(move):
-                victim = self.board.board[move[1]]
-                attacker = self.board.board[move[0]]
-                score += 10 * victim - attacker
-                
-            # 2. Promotions
-            if move[2]:  # Promotion piece
-                score += 900 if move[2] == QUEEN else 500  # Queen or Rook
+                return score
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
                 
-            # 3. History heuristic
-            move_key = (move[0], move[1])
-            if move_key in self.move_history:
-                score += self.move_history[move_key]
-                
-            move_scores.append((move, score))
-            
-        # Sort moves by score in descending order
-        move_scores.sort(key=lambda x: x[1], reverse=True)
-        return [move for move, _ in move_scores]
-        
-    def update_move_history(self, move: Tuple[int, int, int], depth: int):
-        move_key = (move[0], move[1])
-        if move_key not in self.move_history:
-            self.move_history[move_key] = 0
-        self.move_history[move_key] += depth * depth
-        
-    def is_capture(self, move: Tuple[int, int, int]) -> bool:
-        to_sq = move[1]
-        return self.board.board[to_sq] != EMPTY
-        
-    def make_move(self, move: Tuple[int, int, int]) -> dict:
-        # Save current state
-        old_state = {
-            'board': self.board.board.copy(),
-            'color': self.board.color.copy(),
-            'castling_rights': self.board.castling_rights.copy(),
-            'ep_square': self.board.ep_square,
-            'side_to_move': self.board.side_to_move
-        }
-        
-        self.board.make_move(move)
-        return old_state
+        return best_score
         
-    def unmake_move(self, old_state: dict):
-        self.board.board = old_state['board']
-        self.board.color = old_state['color']
-        self.board.castling_rights = old_state['castling_rights']
-        self.board.ep_square = old_state['ep_square']
-        self.board.side_to_move = old_state['side_to_move']
+    def update_move_history(self, move: int, depth: int):
+        self.move_history[move & MOVE_FROM_TO_MASK] += depth * depth
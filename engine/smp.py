@@ -0,0 +1,103 @@
+import multiprocessing
+import queue
+from multiprocessing.shared_memory import SharedMemory
+from typing import Tuple
+from .transposition import TranspositionTable, table_bytes
+
+# Lazy SMP: helper processes run the same iterative deepening as the main
+# search on one shared transposition table and communicate through nothing
+# else. Their entries cut off and reorder the main search; whichever process
+# completes the deepest iteration supplies the move.
+
+RESULT_TIMEOUT = 2.0  # Seconds to wait on a helper once it has been told to stop
+
+# Helpers are never forked from the caller: it always has other threads
+# running (the UCI reader, the app's worker), and a forked child could
+# inherit their locks held. A fork server is single-threaded and, with the
+# engine preloaded, starts helpers almost as fast as a plain fork.
+if "forkserver" in multiprocessing.get_all_start_methods():
+    HELPER_CONTEXT = multiprocessing.get_context("forkserver")
+    HELPER_CONTEXT.set_forkserver_preload([__package__ + ".search"])
+else:
+    HELPER_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def create_shared_table(size_mb: int) -> Tuple[SharedMemory, TranspositionTable]:
+    shared = SharedMemory(create=True, size=table_bytes(size_mb))
+    return shared, TranspositionTable(size_mb, buffer=shared.buf)
+
+
+def helper_search(board, shm_name: str, generation: int, worker_id: int, limits: dict,
+                  stop, results, bitbases=None):
+    from .search import SearchEngine
+    shared = SharedMemory(name=shm_name)
+    table = TranspositionTable(buffer=shared.buf)
+    table.generation = generation  # new_search brings it level with the main search
+    engine = SearchEngine(board, transposition_table=table, bitbases=bitbases)
+    engine.stop_event = stop
+    engine.info_callback = lambda info: results.put(
+        (worker_id, info['depth'], info['score'], engine.best_move, engine.nodes))
+    try:
+        # Odd helpers start a ply deeper so the processes don't search in lockstep
+        engine.iterative_deepening(start_depth=1 + worker_id % 2, **limits)
+    finally:
+        results.put((worker_id, None, None, None, engine.nodes))
+        table.release()
+        shared.close()
+
+
+def lazy_smp_search(engine, limits: dict) -> Tuple[int, int]:
+    # Runs the main search in this process alongside engine.threads - 1 helpers
+    context = HELPER_CONTEXT
+    stop = context.Event()
+    results = context.Queue()
+    helper_limits = dict(limits, nodes=None, ponder=None)  # The main search applies these
+    if limits.get('ponder'):
+        # Helpers can't see the ponder hit; they run until the main search stops them
+        helper_limits.update(movetime=None, wtime=None, btime=None)
+    helpers = [context.Process(target=helper_search, daemon=True,
+                               args=(engine.board, engine.shared_memory.name,
+                                     engine.transposition_table.generation, worker_id,
+                                     helper_limits, stop, results, engine.bitbases))
+               for worker_id in range(1, engine.threads)]
+    for helper in helpers:
+        helper.start()
+
+    try:
+        score, move = engine.iterative_deepening(**limits)
+    finally:
+        stop.set()
+        reports = collect_reports(results, len(helpers))
+        for helper in helpers:
+            helper.join(RESULT_TIMEOUT)
+            if helper.is_alive():
+                helper.terminate()
+
+    # Deepest completed iteration wins; ties go to the main search
+    depth = engine.depth_reached
+    helper_nodes = {}
+    for worker_id, helper_depth, helper_score, helper_move, nodes in reports:
+        helper_nodes[worker_id] = nodes
+        if helper_depth is not None and helper_depth > depth and helper_move is not None:
+            depth, score, move = helper_depth, helper_score, helper_move
+    if depth > engine.depth_reached:
+        engine.depth_reached = depth
+        engine.pv = engine.extract_pv(depth)
+    engine.nodes += sum(helper_nodes.values())
+    engine.best_move = move
+    return score, move
+
+
+def collect_reports(results, helpers: int) -> list:
+    # Drain until every helper has sent its final report; done before joining,
+    # since a process blocks on exit until its queued items are consumed
+    reports = []
+    while helpers:
+        try:
+            report = results.get(timeout=RESULT_TIMEOUT)
+        except queue.Empty:
+            break
+        reports.append(report)
+        if report[1] is None:
+            helpers -= 1
+    return reports
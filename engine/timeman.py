@@ -0,0 +1,60 @@
+import time
+from .constants import WHITE
+
+# Never plan to use the very last of the clock
+MOVE_OVERHEAD_MS = 30
+
+
+class TimeManager:
+    """Turns UCI-style limits (all in milliseconds) into search deadlines.
+
+    The soft limit decides whether another iteration is worth starting; the
+    hard limit aborts an iteration already in progress. A pondering search
+    passes an Event for the ponder hit: until it is set there is no deadline,
+    and the limits count from the moment it is.
+    """
+
+    def __init__(self, side: int = WHITE, movetime: int = None, wtime: int = None,
+                 btime: int = None, winc: int = 0, binc: int = 0, movestogo: int = None,
+                 ponder=None):
+        self.start_time = time.perf_counter()
+        self.ponder = ponder
+        self.soft_limit = None
+        self.hard_limit = None
+
+        if movetime is not None:
+            self.soft_limit = self.hard_limit = max(1, movetime - MOVE_OVERHEAD_MS) / 1000
+            return
+
+        remaining = wtime if side == WHITE else btime
+        if remaining is None:
+            return  # Depth/node limited or infinite
+        increment = (winc if side == WHITE else binc) or 0
+        moves_left = movestogo if movestogo else 30
+        usable = max(1, remaining - MOVE_OVERHEAD_MS)
+
+        allocation = usable / moves_left + increment * 0.75
+        self.soft_limit = min(allocation, usable * 0.5) / 1000
+        self.hard_limit = min(allocation * 4, usable * 0.8) / 1000
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start_time
+
+    def pondering(self) -> bool:
+        if self.ponder is None:
+            return False
+        if not self.ponder.is_set():
+            return True
+        # Ponder hit: the clock starts now
+        self.ponder = None
+        self.start_time = time.perf_counter()
+        return False
+
+    def should_stop(self) -> bool:
+        return (self.hard_limit is not None and not self.pondering()
+                and self.elapsed() >= self.hard_limit)
+
+    def can_start_iteration(self) -> bool:
+        # The next iteration usually costs several times the last, so stop early
+        return (self.soft_limit is None or self.pondering()
+                or self.elapsed() < self.soft_limit * 0.6)
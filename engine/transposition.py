@@ -0,0 +1,130 @@
+from array import array
+from typing import Optional, Tuple
+
+# Bound types stored with each entry
+EXACT = 0
+LOWER = 1  # fail-high: true score >= stored score
+UPPER = 2  # fail-low: true score <= stored score
+
+# Packed data word layout (64 bits):
+#   bits  0-23  best move (the packed move from movegen, flags included)
+#   bits 24-39  score + SCORE_OFFSET
+#   bits 40-47  depth
+#   bits 48-49  bound type
+#   bits 50-57  generation
+SCORE_OFFSET = 1 << 15
+MOVE_MASK = (1 << 24) - 1
+ENTRY_WORDS = 2  # key ^ data, data (lockless XOR verification)
+BUCKET_WORDS = 2 * ENTRY_WORDS  # depth-preferred slot, always-replace slot
+
+
+def table_bytes(size_mb: int) -> int:
+    # Bytes a table of size_mb occupies: the bucket count rounds down to a
+    # power of two so indexing is a mask
+    bucket_bytes = BUCKET_WORDS * 8
+    buckets = max(1, (size_mb * 1024 * 1024) // bucket_bytes)
+    return (1 << (buckets.bit_length() - 1)) * bucket_bytes
+
+
+class TranspositionTable:
+    def __init__(self, size_mb: int = 16, buffer=None):
+        # buffer: writable memory to use as the table instead of allocating
+        # one, e.g. a multiprocessing.shared_memory block shared by several
+        # searching processes. The XOR check makes concurrent access safe:
+        # a torn entry fails verification and reads as a miss.
+        self.size_mb = size_mb
+        self.generation = 0
+        if buffer is None:
+            self.resize(size_mb)
+        else:
+            self.attach(buffer)
+
+    def resize(self, size_mb: int):
+        size = table_bytes(size_mb)
+        self.num_buckets = size // (BUCKET_WORDS * 8)
+        self.mask = self.num_buckets - 1
+        self.size_mb = size_mb
+        self.table = array('Q', bytes(size))
+
+    def attach(self, buffer):
+        words = memoryview(buffer).cast('Q')
+        self.size_mb = len(words) * 8 // (1024 * 1024)
+        buckets = max(1, len(words) // BUCKET_WORDS)
+        self.num_buckets = 1 << (buckets.bit_length() - 1)
+        self.mask = self.num_buckets - 1
+        self.table = words[:self.num_buckets * BUCKET_WORDS]
+
+    def release(self):
+        # Drop the view of an attached buffer so its owner can close it
+        if isinstance(self.table, memoryview):
+            self.table.release()
+
+    def clear(self):
+        if isinstance(self.table, memoryview):
+            self.table.cast('B')[:] = bytes(len(self.table) * 8)
+        else:
+            self.table = array('Q', bytes(len(self.table) * 8))
+        self.generation = 0
+
+    def new_search(self):
+        # Entries from older generations are the first to be replaced
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, Optional[int]]]:
+        # Returns (score, depth, bound, best_move) or None on a miss
+        table = self.table
+        base = (key & self.mask) * BUCKET_WORDS
+        for slot in (base, base + ENTRY_WORDS):
+            data = table[slot + 1]
+            if data and table[slot] ^ data == key:
+                return ((data >> 24 & 0xFFFF) - SCORE_OFFSET,
+                        data >> 40 & 0xFF,
+                        data >> 48 & 0x3,
+                        data & MOVE_MASK or None)
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int,
+              move: Optional[int] = None):
+        table = self.table
+        base = (key & self.mask) * BUCKET_WORDS
+        always = base + ENTRY_WORDS
+
+        score = int(max(-SCORE_OFFSET + 1, min(SCORE_OFFSET - 1, score)))
+        packed_move = move or 0
+
+        # Keep the previous best move if this search didn't find one
+        if not packed_move:
+            for slot in (base, always):
+                old = table[slot + 1]
+                if old and table[slot] ^ old == key:
+                    packed_move = old & MOVE_MASK
+                    break
+
+        data = (packed_move
+                | (score + SCORE_OFFSET) << 24
+                | min(max(depth, 0), 0xFF) << 40
+                | bound << 48
+                | self.generation << 50
+                | 1 << 63)  # never zero, so an empty slot is distinguishable
+
+        # Depth-preferred slot: take it for the same position, a stale
+        # generation or an entry searched no deeper than this one
+        old = table[base + 1]
+        if (not old or table[base] ^ old == key
+                or (old >> 50 & 0xFF) != self.generation
+                or depth >= (old >> 40 & 0xFF)):
+            table[base] = key ^ data
+            table[base + 1] = data
+        else:
+            table[always] = key ^ data
+            table[always + 1] = data
+
+    def hashfull(self) -> int:
+        # Permille of sampled entries written during the current search
+        sample = min(1000, self.num_buckets * 2)
+        used = 0
+        for i in range(sample):
+            data = self.table[i * ENTRY_WORDS + 1]
+            if data and (data >> 50 & 0xFF) == self.generation:
+                used += 1
+        return used * 1000 // sample
@@ -0,0 +1,218 @@
+import os
+import sys
+import threading
+from typing import List, Optional, TextIO
+from .board import Board, START_FEN, move_to_uci
+from .bitbase import EndgameTables
+from .book import OpeningBook
+from .search import SearchEngine
+from .constants import MATE_SCORE, MATE_BOUND
+from .worker import STOP_POLL
+
+# UCI front end: one engine, and with it one transposition table, stays warm
+# for the life of the process. Searches run on a background thread so stop
+# and ponderhit are read while they think.
+
+ENGINE_NAME = "equifAI"
+ENGINE_AUTHOR = "equifAI contributors"
+MAX_HASH_MB = 1024
+GO_INT_ARGS = ("wtime", "btime", "winc", "binc", "movestogo", "depth", "nodes", "movetime")
+
+
+class UCIEngine:
+    def __init__(self, output: TextIO = sys.stdout, hash_mb: int = 16, threads: int = 1):
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.board = Board()
+        # Bitbases generated with python -m engine.bitbase are picked up if present
+        self.engine = SearchEngine(self.board, hash_mb, threads,
+                                   bitbases=EndgameTables.load())
+        self.engine.info_callback = self.send_info
+        self.thread = None
+        self.ponder = False  # Ponder option: whether bestmove suggests a move to ponder on
+        self.ponder_event = None  # Set by ponderhit
+        self.release = threading.Event()  # Set by stop or ponderhit
+        self.commands = {
+            "uci": self.uci, "isready": self.isready, "ucinewgame": self.ucinewgame,
+            "setoption": self.setoption, "position": self.position, "go": self.go,
+            "stop": self.stop, "ponderhit": self.ponderhit,
+        }
+
+    def send(self, line: str):
+        # Info lines come from the search thread, replies from the reader
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def run(self, lines: TextIO = sys.stdin):
+        for line in lines:
+            if not self.handle(line):
+                break
+        self.close()
+
+    def handle(self, line: str) -> bool:
+        # Returns False on quit; unknown commands are ignored, as UCI asks
+        tokens = line.split()
+        if not tokens:
+            return True
+        if tokens[0] == "quit":
+            return False
+        command = self.commands.get(tokens[0])
+        if command:
+            command(tokens[1:])
+        return True
+
+    def uci(self, args: List[str]):
+        self.send(f"id name {ENGINE_NAME}")
+        self.send(f"id author {ENGINE_AUTHOR}")
+        self.send(f"option name Hash type spin default {self.engine.hash_mb} "
+                  f"min 1 max {MAX_HASH_MB}")
+        self.send(f"option name Threads type spin default {self.engine.threads} "
+                  f"min 1 max {os.cpu_count() or 1}")
+        self.send("option name Ponder type check default false")
+        self.send("option name BookFile type string default <empty>")
+        self.send("uciok")
+
+    def isready(self, args: List[str]):
+        self.send("readyok")
+
+    def ucinewgame(self, args: List[str]):
+        self.wait()
+        self.engine.transposition_table.clear()
+        self.engine.move_history = [0] * len(self.engine.move_history)
+
+    def setoption(self, args: List[str]):
+        # setoption name <name> [value <value>]; names are case-insensitive
+        text = " ".join(args)
+        name, _, value = text.partition(" value ")
+        name = name.replace("name", "", 1).strip().lower()
+        self.wait()
+        try:
+            if name == "hash":
+                self.engine.set_hash(max(1, min(int(value), MAX_HASH_MB)))
+            elif name == "threads":
+                self.engine.set_threads(int(value))
+            elif name == "ponder":
+                self.ponder = value.strip().lower() == "true"
+            elif name == "bookfile":
+                self.set_book(value.strip())
+        except ValueError:
+            self.send(f"info string invalid value for {name}: {value.strip()}")
+
+    def set_book(self, path: str):
+        if self.engine.book is not None:
+            self.engine.book.close()
+            self.engine.book = None
+        if path and path != "<empty>":
+            try:
+                self.engine.book = OpeningBook(path)
+            except OSError as exc:
+                self.send(f"info string cannot open book {path}: {exc.strerror}")
+
+    def position(self, args: List[str]):
+        # position (startpos | fen <fen>) [moves <move>...]. The whole command
+        # is checked on a scratch board first, so a bad one leaves the
+        # previous position in place
+        self.wait()
+        moves = args.index("moves") if "moves" in args else len(args)
+        fen = " ".join(args[1:moves]) if args and args[0] == "fen" else START_FEN
+        scratch = Board()
+        try:
+            scratch.set_fen(fen)
+        except ValueError as exc:
+            self.send(f"info string invalid position: {exc}")
+            return
+        for token in args[moves + 1:]:
+            try:
+                move = scratch.parse_move(token)
+            except (ValueError, IndexError):
+                move = None
+            if move is None or move not in scratch.movegen.generate_moves():
+                self.send(f"info string illegal move: {token}")
+                return
+            scratch.make_move(move)
+        self.board.set_fen(fen)
+        for token in args[moves + 1:]:
+            self.board.make_move(self.board.parse_move(token))
+
+    def go(self, args: List[str]):
+        self.wait()
+        limits = {}
+        infinite = pondering = False
+        for i, token in enumerate(args):
+            if token in GO_INT_ARGS and i + 1 < len(args):
+                try:
+                    limits[token] = int(args[i + 1])
+                except ValueError:
+                    self.send(f"info string invalid value for {token}: {args[i + 1]}")
+            elif token == "infinite":
+                infinite = True
+            elif token == "ponder":
+                pondering = True
+        self.release.clear()
+        self.ponder_event = threading.Event() if pondering else None
+        self.thread = threading.Thread(target=self.think, daemon=True,
+                                       args=(limits, infinite, self.ponder_event))
+        self.thread.start()
+
+    def think(self, limits: dict, infinite: bool, ponder_event: Optional[threading.Event]):
+        score, move = self.engine.search(ponder=ponder_event, **limits)
+        if infinite or (ponder_event and not ponder_event.is_set()):
+            # UCI holds bestmove back until stop (or ponderhit) in these modes
+            self.release.wait()
+        pv = self.engine.pv
+        if move is None:
+            self.send("bestmove 0000")
+        elif self.ponder and len(pv) > 1 and pv[0] == move:
+            self.send(f"bestmove {move_to_uci(move)} ponder {move_to_uci(pv[1])}")
+        else:
+            self.send(f"bestmove {move_to_uci(move)}")
+
+    def send_info(self, info: dict):
+        time_ms = int(info['time'] * 1000)
+        pv = " ".join(move_to_uci(move) for move in info['pv'])
+        self.send(f"info depth {info['depth']} score {format_score(info['score'])} "
+                  f"nodes {info['nodes']} nps {info['nps']} time {time_ms} "
+                  f"hashfull {self.engine.transposition_table.hashfull()} pv {pv}")
+
+    def stop(self, args: List[str]):
+        # The search thread sends bestmove on its way out
+        self.wait()
+
+    def ponderhit(self, args: List[str]):
+        # The expected move was played: the ponder search becomes the real one
+        if self.ponder_event is not None:
+            self.ponder_event.set()
+        self.release.set()
+
+    def wait(self):
+        # Ends the running search, if any, before state changes under it.
+        # search() clears the stop flag when it starts, so keep asking until
+        # the thread has gone
+        self.release.set()
+        while self.thread is not None and self.thread.is_alive():
+            self.engine.stop()
+            self.thread.join(STOP_POLL)
+        self.thread = None
+
+    def close(self):
+        self.wait()
+        self.set_book("")
+        self.engine.close()
+
+
+def format_score(score: int) -> str:
+    # Mates are reported in moves, negative when the engine is getting mated
+    if score >= MATE_BOUND:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"mate {-((MATE_SCORE + score) // 2)}"
+    return f"cp {score}"
+
+
+def main():
+    UCIEngine().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import threading
+from typing import Optional, Tuple
+from .board import Board, move_to_uci
+from .search import SearchEngine
+
+STOP_POLL = 0.05  # Seconds between stop requests while a search winds down
+
+
+class SearchWorker:
+    """Runs the engine on a background thread so a UI never blocks on it.
+
+    think() starts a search and poll() returns the result once it is ready.
+    After the engine has moved, ponder() searches the position after the
+    reply it expects while the opponent thinks. If that reply is played,
+    think() turns the ponder search into the real one: it keeps its tree and
+    only now starts its clock (a ponder hit). Any other reply stops it, and
+    the new search still reuses the transposition table.
+    """
+
+    def __init__(self, hash_mb: int = 16, threads: int = 1, book=None, bitbases=None):
+        # The worker searches its own board, never the caller's
+        self.board = Board()
+        self.engine = SearchEngine(self.board, hash_mb, threads, book=book, bitbases=bitbases)
+        self.thread = None
+        self.result = None  # (score, move) from the last finished search
+        self.pv = []
+        self.limits = None  # Limits of the running search
+        self.ponder_move = None  # Reply the running ponder search assumes, in UCI
+        self.ponder_event = None  # Set on a ponder hit
+        self.ponder_hits = 0
+
+    @property
+    def pondering(self) -> bool:
+        return self.ponder_event is not None and not self.ponder_event.is_set()
+
+    @property
+    def thinking(self) -> bool:
+        # A search someone is waiting on: running, or finished and not yet polled
+        return self.thread is not None and not self.pondering
+
+    def think(self, fen: str, last_move: str = None, **limits):
+        # fen is the position to move from and last_move the reply that led
+        # to it; limits are SearchEngine.search's
+        if self.pondering and last_move == self.ponder_move and limits == self.limits:
+            self.ponder_event.set()
+            self.ponder_hits += 1
+            return
+        self.stop()
+        self.board.set_fen(fen)
+        self.start(limits)
+
+    def ponder(self, fen: str, move: str, **limits):
+        # fen is the position after the engine's move, move the expected
+        # reply; limits are the ones the search gets on a ponder hit
+        self.stop()
+        self.board.set_fen(fen)
+        self.board.make_move(self.board.parse_move(move))
+        self.ponder_move = move
+        self.start(limits, threading.Event())
+
+    def expected_reply(self) -> Optional[str]:
+        # Second move of the last finished search's PV, the one to ponder on
+        return move_to_uci(self.pv[1]) if len(self.pv) > 1 else None
+
+    def start(self, limits: dict, ponder_event: threading.Event = None):
+        self.result = None
+        self.pv = []
+        self.limits = limits
+        self.ponder_event = ponder_event
+        self.thread = threading.Thread(target=self.run, args=(limits, ponder_event),
+                                       daemon=True)
+        self.thread.start()
+
+    def run(self, limits: dict, ponder_event: threading.Event):
+        result = self.engine.search(ponder=ponder_event, **limits)
+        self.pv = list(self.engine.pv)
+        self.result = result
+
+    def poll(self) -> Optional[Tuple[int, int]]:
+        # Non-blocking: the finished search's (score, move), once; None while
+        # it runs or ponders
+        if self.thread is None or self.thread.is_alive() or self.pondering:
+            return None
+        self.thread.join()
+        self.thread = None
+        self.ponder_event = None
+        self.ponder_move = None
+        return self.result
+
+    def wait(self, timeout: float = None) -> Optional[Tuple[int, int]]:
+        if self.thread is not None and not self.pondering:
+            self.thread.join(timeout)
+        return self.poll()
+
+    def stop(self):
+        # Abandons the running search, if any. search() clears the stop flag
+        # when it starts, so keep asking until the thread has gone
+        thread = self.thread
+        while thread is not None and thread.is_alive():
+            self.engine.stop()
+            thread.join(STOP_POLL)
+        self.thread = None
+        self.result = None
+        self.ponder_event = None
+        self.ponder_move = None
+
+    def close(self):
+        self.stop()
+        self.engine.close()
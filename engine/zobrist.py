@@ -0,0 +1,33 @@
+import random
+from .constants import *
+
+# Fixed seed so keys (and anything persisted with them) are stable across runs
+_rng = random.Random(0x5A0B12157)
+
+# PIECE_KEYS[color][piece][square] over the 10x12 mailbox; border squares stay 0
+PIECE_KEYS = [[[0] * 120 for _ in range(7)] for _ in (WHITE, BLACK)]
+for _color in (WHITE, BLACK):
+    for _piece in range(PAWN, KING + 1):
+        for _rank in range(8):
+            for _file in range(8):
+                PIECE_KEYS[_color][_piece][21 + _rank * 10 + _file] = _rng.getrandbits(64)
+
+SIDE_KEY = _rng.getrandbits(64)
+
+# CASTLING_KEYS[color][0] is kingside, [1] is queenside
+CASTLING_KEYS = [[_rng.getrandbits(64), _rng.getrandbits(64)] for _ in (WHITE, BLACK)]
+
+EP_KEYS = [0] * 120
+for _rank in range(8):
+    for _file in range(8):
+        EP_KEYS[21 + _rank * 10 + _file] = _rng.getrandbits(64)
+
+# Key for each castling bitmask: the XOR of the keys of its rights, so
+# CASTLING_MASK_KEYS[a] ^ CASTLING_MASK_KEYS[b] == CASTLING_MASK_KEYS[a ^ b]
+CASTLING_MASK_KEYS = [0] * 16
+for _mask in range(16):
+    for _color in (WHITE, BLACK):
+        for _side in (0, 1):
+            if _mask & CASTLING_BITS[_color][_side]:
+                CASTLING_MASK_KEYS[_mask] ^= CASTLING_KEYS[_color][_side]
+
@@ -1,17 +1,33 @@
 import streamlit as st
 import chess
 import chess.svg
-from engine.board import Board
-from engine.search import SearchEngine
+from engine.board import Board, move_to_uci
+from engine.worker import SearchWorker
 from engine.evaluation import Evaluator
+from engine.book import OpeningBook
+from engine.bitbase import EndgameTables
+import os
 import time
 from datetime import timedelta
 
+BOOK_PATH = os.environ.get('CHESS_BOOK', 'assets/book.bin')
+
+@st.cache_resource
+def load_book():
+    # One memory-mapped book shared by every session; none if the file is missing
+    return OpeningBook(BOOK_PATH) if os.path.exists(BOOK_PATH) else None
+
+@st.cache_resource
+def load_bitbases():
+    # Endgame bitbases generated with python -m engine.bitbase, if any
+    return EndgameTables.load()
+
 def init_session_state():
     if 'board' not in st.session_state:
         st.session_state.board = Board()
         st.session_state.game = chess.Board()
-        st.session_state.search_engine = SearchEngine(st.session_state.board)
+        # Searches run on the worker's thread, so reruns never wait on the engine
+        st.session_state.worker = SearchWorker(book=load_book(), bitbases=load_bitbases())
         st.session_state.evaluator = Evaluator()
         st.session_state.start_time = time.time()
         st.session_state.last_move = None  # Track last move made
@@ -25,50 +41,18 @@ def get_game_time():
     elapsed = time.time() - st.session_state.start_time
     return format_time(elapsed)
 
-def convert_to_internal(square):
-    file = square % 8
-    rank = square // 8
-    return 21 + file + ((7 - rank) * 10)
-
-def convert_from_internal(square):
-    file = (square - 21) % 10
-    rank = 7 - ((square - 21) // 10)
-    if 0 <= file < 8 and 0 <= rank < 8:
-        return rank * 8 + file
-    return None
-
 def handle_move(move_str):
     try:
-        # Parse the move
-        from_square = chess.parse_square(move_str[:2])
-        to_square = chess.parse_square(move_str[2:4])
-        promotion = chess.QUEEN if len(move_str) > 4 and move_str[4].lower() == 'q' else None
-
-        # Create the move
-        chess_move = chess.Move(from_square, to_square, promotion=promotion)
-
-        # Make move on chess.Board
-        st.session_state.game.push(chess_move)
+        # python-chess holds the game; the engine board is rebuilt from its FEN
+        st.session_state.game.push(chess.Move.from_uci(move_str))
         st.session_state.last_move = move_str  # Store the move
+        st.session_state.board.set_fen(st.session_state.game.fen())
 
-        # Make move on internal board
-        internal_from = convert_to_internal(from_square)
-        internal_to = convert_to_internal(to_square)
-        st.session_state.board.make_move((internal_from, internal_to, promotion if promotion else 0))
-
-        # Generate engine response
+        # Start the engine's reply in the background; if it was pondering on
+        # this move the search is already under way
         if not st.session_state.game.is_game_over():
-            with st.spinner('Engine thinking...'):
-                score, engine_move = st.session_state.search_engine.search(search_depth)
-                if engine_move:
-                    chess_from = convert_from_internal(engine_move[0])
-                    chess_to = convert_from_internal(engine_move[1])
-                    engine_chess_move = chess.Move(chess_from, chess_to,
-                                                 promotion=engine_move[2] if engine_move[2] else None)
-
-                    if engine_chess_move in st.session_state.game.legal_moves:
-                        st.session_state.game.push(engine_chess_move)
-                        st.session_state.board.make_move(engine_move)
+            st.session_state.worker.think(st.session_state.game.fen(), last_move=move_str,
+                                          **engine_limits())
 
         st.rerun()
         return True
@@ -76,6 +60,30 @@ def handle_move(move_str):
         st.error(f"Move error: {str(e)}")
         return False
 
+def engine_limits():
+    return {'depth': search_depth, 'movetime': think_time * 1000}
+
+@st.fragment(run_every=0.25)
+def poll_engine():
+    # Picks up the engine's move without blocking the rest of the page
+    worker = st.session_state.worker
+    if not worker.thinking:
+        return
+    result = worker.poll()
+    if result is None:
+        st.info('Engine thinking...')
+        return
+    score, engine_move = result
+    if engine_move:
+        # The engine only generates legal moves
+        st.session_state.game.push(chess.Move.from_uci(move_to_uci(engine_move)))
+        st.session_state.board.set_fen(st.session_state.game.fen())
+        # Think on the reply the engine expects while the user decides
+        reply = worker.expected_reply()
+        if reply and not st.session_state.game.is_game_over():
+            worker.ponder(st.session_state.game.fen(), reply, **engine_limits())
+    st.rerun(scope="app")
+
 # Initialize session state
 init_session_state()
 
@@ -86,6 +94,7 @@ st.title('equifAI Chess Game')
 st.sidebar.header('Controls')
 difficulty = st.sidebar.slider('Engine Strength', 1, 5, 3)
 search_depth = difficulty
+think_time = st.sidebar.slider('Max thinking time (s)', 1, 10, 3)
 
 # Main board display
 col1, col2 = st.columns([2, 1])
@@ -121,12 +130,15 @@ with col2:
     evaluation = st.session_state.evaluator.evaluate(st.session_state.board)
     st.write(f'Evaluation: {evaluation/100:.2f}')
 
+    poll_engine()
+
     # Move input section
     move_input = st.text_input('Make a move (e.g., e2e4):', '')
 
     # Process move input
-    if move_input and move_input != st.session_state.last_move:  # Only process if it's a new move
-        legal_moves = [move.uci() for move in st.session_state.game.legal_moves]
+    if (move_input and move_input != st.session_state.last_move  # Only process if it's a new move
+            and not st.session_state.worker.thinking):
+        legal_moves = [move_to_uci(move) for move in st.session_state.board.movegen.generate_moves()]
         if move_input in legal_moves:
             handle_move(move_input)
         elif move_input not in legal_moves and st.session_state.last_move != move_input:
@@ -136,7 +148,7 @@ with col2:
     if st.button('New Game'):
         st.session_state.board = Board()
         st.session_state.game = chess.Board()
-        st.session_state.search_engine = SearchEngine(st.session_state.board)
+        st.session_state.worker.stop()
         st.session_state.evaluator = Evaluator()
         st.session_state.start_time = time.time()
         st.session_state.last_move = None
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import unittest
+from engine.analyze import (parse_position, read_positions, analyze, Checkpoint,
+                            open_output, write_results)
+from engine.board import START_FEN
+from engine.perft import STANDARD_POSITIONS
+
+class TestAnalyze(unittest.TestCase):
+    def test_parse_position(self):
+        self.assertEqual(parse_position(START_FEN), (START_FEN, None))
+        fen, epd_id = parse_position('8/8/8/8/8/8/8/K6k b - - bm Kb2; id "WAC.001";')
+        self.assertEqual(fen, "8/8/8/8/8/8/8/K6k b - - 0 1")
+        self.assertEqual(epd_id, "WAC.001")
+
+    def test_read_positions_is_lazy_and_resumable(self):
+        def lines():
+            yield "# comment"
+            for i in range(1000000):
+                yield START_FEN
+                yield ""
+        positions = read_positions(lines(), start=3)
+        self.assertEqual(next(positions), (3, START_FEN, None))
+        self.assertEqual(next(positions)[0], 4)
+
+    def test_analyze_in_order(self):
+        positions = [(i, fen, name) for i, (name, fen, _) in enumerate(STANDARD_POSITIONS)]
+        results = list(analyze(iter(positions), workers=2, limits={"depth": 2}, max_in_flight=2))
+        self.assertEqual([r["index"] for r in results], list(range(len(positions))))
+        for result in results:
+            self.assertNotIn("error", result)
+            self.assertEqual(result["depth"], 2)
+            self.assertIn(len(result["bestmove"]), (4, 5))
+
+        unordered = analyze(iter(positions), workers=2, limits={"depth": 1}, ordered=False)
+        self.assertEqual(sorted(r["index"] for r in unordered), list(range(len(positions))))
+
+    def test_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "progress.json")
+            self.assertEqual(Checkpoint.load(path).offset, 0)
+            checkpoint = Checkpoint(path, 10)
+            # Out-of-order completions only advance past a contiguous prefix
+            for index in (11, 12, 10, 14):
+                checkpoint.done(index)
+            checkpoint.save(123)
+            loaded = Checkpoint.load(path)
+            self.assertEqual((loaded.offset, loaded.completed, loaded.position), (13, {14}, 123))
+
+    def test_resume_after_interrupt(self):
+        # Results complete out of order and the run dies two results after
+        # the last checkpoint save
+        completion = [1, 0, 3, 2, 5, 7, 4, 6, 9, 8]
+        positions = [(i, START_FEN, None) for i in range(10)]
+
+        def results(indexes, stop_after=None):
+            for count, index in enumerate(indexes):
+                if count == stop_after:
+                    raise KeyboardInterrupt
+                yield {"index": index}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.jsonl")
+            checkpoint = Checkpoint(os.path.join(tmp, "progress.json"))
+            with open_output(path, checkpoint, False) as output:
+                with self.assertRaises(KeyboardInterrupt):
+                    write_results(results(completion, stop_after=8), output, checkpoint, 3)
+
+            checkpoint = Checkpoint.load(checkpoint.path)
+            self.assertEqual((checkpoint.offset, checkpoint.completed), (4, {5, 7}))
+            remaining = checkpoint.remaining(read_positions([START_FEN] * 10, checkpoint.offset))
+            with open_output(path, checkpoint, True) as output:
+                write_results(results(index for index, _, _ in remaining), output, checkpoint, 3)
+
+            with open(path) as f:
+                indexes = [json.loads(line)["index"] for line in f]
+            self.assertEqual(sorted(indexes), list(range(10)))
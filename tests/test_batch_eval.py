@@ -0,0 +1,63 @@
+import random
+import unittest
+from engine.board import Board
+from engine.evaluation import Evaluator
+from engine.perft import STANDARD_POSITIONS
+from engine.constants import *
+
+try:
+    import numpy
+    from engine.batch_eval import BatchEvaluator, pack_boards, pack_fens, to_bitboards
+except ImportError:
+    numpy = None
+
+@unittest.skipUnless(numpy, "numpy not installed")
+class TestBatchEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.evaluator = Evaluator(0)
+        self.batch = BatchEvaluator()
+        # Standard positions plus random playouts from each, both sides to move
+        rng = random.Random(7)
+        self.boards = []
+        for _, fen, _ in STANDARD_POSITIONS:
+            for plies in (0, 5, 15, 40):
+                board = Board()
+                board.set_fen(fen)
+                for _ in range(plies):
+                    moves = board.movegen.generate_moves()
+                    if not moves:
+                        break
+                    board.make_move(rng.choice(moves))
+                self.boards.append(board)
+
+    def test_matches_evaluator(self):
+        expected = [self.evaluator.evaluate(board) for board in self.boards]
+        self.assertEqual(list(self.batch.evaluate_boards(self.boards)), expected)
+
+    def test_pack_fens(self):
+        fens = [fen for _, fen, _ in STANDARD_POSITIONS] + ["8/8/8/8/8/8/8/K6k b - - 0 1"]
+        boards = []
+        for fen in fens:
+            board = Board()
+            board.set_fen(fen)
+            boards.append(board)
+        squares, sides = pack_fens(fens)
+        self.assertEqual(squares.shape, (len(fens), 64))
+        self.assertEqual(squares.dtype, numpy.int8)
+        board_squares, board_sides = pack_boards(boards)
+        self.assertTrue((squares == board_squares).all())
+        self.assertTrue((sides == board_sides).all())
+        self.assertEqual(squares[0, 0], -ROOK)  # a8
+        self.assertEqual(squares[0, 60], KING)  # e1
+
+    def test_terms(self):
+        # Each term against its scalar counterpart, from white's perspective
+        squares, sides = pack_boards(self.boards)
+        pawns = self.batch.evaluate_pawn_structure(to_bitboards(squares == PAWN),
+                                                   to_bitboards(squares == -PAWN))
+        self.assertEqual(list(pawns),
+                         [self.evaluator.compute_pawn_structure(board) for board in self.boards])
+        material = self.batch.evaluate_material_and_position(squares)
+        self.assertEqual(list(material),
+                         [self.evaluator.evaluate_material(board) +
+                          self.evaluator.evaluate_position(board) for board in self.boards])
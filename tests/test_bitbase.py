@@ -0,0 +1,125 @@
+import random
+import tempfile
+import unittest
+from engine.board import Board
+from engine.evaluation import Evaluator
+from engine.search import SearchEngine
+from engine.bitbase import EndgameTables, generate_tables, TABLE_POSITIONS, SQ120
+from engine.constants import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PIECE_CHARS = " PNBRQK"
+
+
+def random_position(rng: random.Random, piece: int) -> str:
+    # FEN of a legal-looking placement of K + piece vs K, either side strong
+    while True:
+        squares = rng.sample(range(64), 3)
+        if piece == PAWN and not 8 <= squares[1] < 56:
+            continue
+        rows = [["1"] * 8 for _ in range(8)]
+        strong = rng.choice((WHITE, BLACK))
+        for sq, (p, color) in zip(squares, ((KING, strong), (piece, strong), (KING, strong ^ 1))):
+            char = PIECE_CHARS[p]
+            rows[sq // 8][sq % 8] = char if color == WHITE else char.lower()
+        placement = "/".join("".join(row) for row in rows)
+        return f"{placement} {rng.choice('wb')} - - 0 1"
+
+
+@unittest.skipUnless(numpy, "numpy not installed")
+class TestBitbases(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Round trip through the packed files
+        with tempfile.TemporaryDirectory() as tmp:
+            generate_tables().save(tmp)
+            cls.tables = EndgameTables.load(tmp)
+
+    def setUp(self):
+        self.board = Board()
+
+    def test_known_results(self):
+        # Longest mates: KQK 10 moves, KRK 16; KPK wins by side to move
+        dtm = {piece: numpy.frombuffer(table[1], dtype=numpy.uint8)
+               for piece, table in self.tables.tables.items()}
+        half = TABLE_POSITIONS // 2
+        self.assertEqual(int(dtm[QUEEN][:half].max()) - 1, 19)
+        self.assertEqual(int(dtm[ROOK][:half].max()) - 1, 31)
+        self.assertEqual(int((dtm[PAWN][:half] > 0).sum()), 124960)
+        self.assertEqual(int((dtm[PAWN][half:] > 0).sum()), 97604)
+
+    def test_probe_matches_one_ply_search(self):
+        # Every probed score follows from the scores after each legal move
+        rng = random.Random(3)
+        for piece in (QUEEN, ROOK, PAWN):
+            checked = 0
+            while checked < 150:
+                try:
+                    self.board.set_fen(random_position(rng, piece))
+                except ValueError:
+                    continue
+                if self.board.in_check(self.board.side_to_move ^ 1):
+                    continue
+                score = self.tables.probe(self.board)
+                self.assertIsNotNone(score)
+                self.assertEqual(score, self.backed_up_score(), self.board.get_fen())
+                self.assertEqual(self.tables.probe_wdl(self.board), (score > 0) - (score < 0))
+                checked += 1
+
+    def backed_up_score(self) -> int:
+        best = None
+        for move in self.board.movegen.generate_moves():
+            self.board.make_move(move)
+            child = self.tables.probe(self.board) or 0  # Off the tables is a bare-king draw
+            self.board.unmake_move()
+            score = -(child - 1) if child > 0 else (-child - 1 if child < 0 else 0)
+            best = score if best is None else max(best, score)
+        if best is None:
+            return -MATE_SCORE if self.board.in_check() else 0
+        return best
+
+    def test_probe_results(self):
+        self.board.set_fen("8/8/8/8/8/2k5/2p5/2K5 w - - 0 1")  # Blocked pawn, white to move: draw
+        self.assertEqual(self.tables.probe(self.board), 0)
+        self.board.set_fen("k7/8/1K6/8/8/8/8/7R w - - 0 1")  # Rh8 mates
+        self.assertEqual(self.tables.probe(self.board), MATE_SCORE - 1)
+        self.board.set_fen("k6R/8/1K6/8/8/8/8/8 b - - 0 1")
+        self.assertEqual(self.tables.probe(self.board), -MATE_SCORE)
+        self.board.set_fen("8/8/8/8/8/8/k1K5/8 b - - 0 1")
+        self.assertIsNone(self.tables.probe(self.board))
+
+    def test_search(self):
+        self.board.set_fen("8/8/8/4k3/8/8/8/R3K3 w - - 0 1")
+        engine = SearchEngine(self.board, hash_mb=1, bitbases=self.tables)
+        score, move = engine.search(depth=3)
+        expected = self.tables.probe(self.board)
+        self.assertEqual(score, expected)
+
+        # The move keeps the win at the shortest distance
+        self.board.make_move(move)
+        self.assertEqual(self.tables.probe(self.board), -(expected + 1))
+
+    def test_leaf_mate_distance(self):
+        # Leaves probe in the search too, so the reported distance to mate
+        # doesn't depend on how deep the root searched
+        self.board.set_fen("8/8/8/4k3/8/8/8/K6Q w - - 0 1")
+        expected = self.tables.probe(self.board)
+        for depth in (1, 2, 3):
+            engine = SearchEngine(self.board, hash_mb=1, bitbases=self.tables)
+            self.assertEqual(engine.search(depth=depth)[0], expected)
+
+        # The evaluator itself never returns table scores
+        self.assertLess(abs(Evaluator().evaluate(self.board)), MATE_BOUND)
+
+    def test_squares(self):
+        self.board.set_fen("8/8/8/8/3k4/8/3P4/3K4 b - - 0 1")
+        squares = [0] * 64
+        for index, sq in enumerate(SQ120):
+            if self.board.board[sq] > EMPTY:
+                piece = self.board.board[sq]
+                squares[index] = piece if self.board.color[sq] == WHITE else -piece
+        self.assertEqual(self.tables.probe_squares(squares, BLACK), self.tables.probe(self.board))
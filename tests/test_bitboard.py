@@ -0,0 +1,74 @@
+import random
+import unittest
+from engine.board import Board, decode_move
+from engine.bitboard import (BitboardBoard, BitboardMoveGenerator, SQ64, BIT,
+                             KNIGHT_ATTACKS, rook_attacks, bishop_attacks)
+from engine.search import SearchEngine
+from engine.constants import *
+
+class TestBitboard(unittest.TestCase):
+    def setUp(self):
+        self.board = BitboardBoard()
+
+    def test_backend_chosen_at_construction(self):
+        self.assertIsInstance(self.board.movegen, BitboardMoveGenerator)
+        self.assertEqual(bin(self.board.occupancy[WHITE]).count('1'), 16)
+        self.assertEqual(self.board.bitboards[BLACK][KING], BIT[SQ64[25]])
+
+    def test_attack_tables(self):
+        # Knight on b1 (mailbox 92) reaches a3, c3 and d2
+        self.assertEqual(KNIGHT_ATTACKS[SQ64[92]],
+                         BIT[SQ64[71]] | BIT[SQ64[73]] | BIT[SQ64[84]])
+
+        # Rook on a1 blocked by a piece on a3 and b1
+        occupied = BIT[SQ64[71]] | BIT[SQ64[92]]
+        self.assertEqual(rook_attacks(SQ64[91], occupied),
+                         BIT[SQ64[81]] | BIT[SQ64[71]] | BIT[SQ64[92]])
+
+        # Bishop on c1 on an empty board sees both diagonals to the edge
+        self.assertEqual(bin(bishop_attacks(SQ64[93], 0)).count('1'), 7)
+
+    def test_identical_moves_to_mailbox(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            mailbox = Board()
+            bitboard = BitboardBoard()
+            for _ in range(60):
+                moves = mailbox.movegen.generate_moves()
+                self.assertEqual(sorted(bitboard.movegen.generate_moves()), sorted(moves))
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                if mailbox.board[decode_move(move)[1]] == KING:
+                    break
+                mailbox.make_move(move)
+                bitboard.make_move(move)
+
+            # Bitboards survive unmaking the whole game
+            while bitboard.undo_stack:
+                bitboard.unmake_move()
+            self.assertEqual(bitboard.bitboards, BitboardBoard().bitboards)
+
+    def test_checks_and_pins(self):
+        # Single and double checks, pinned pieces and en passant out of check
+        for fen in ("4k3/8/8/8/1b6/8/3P4/4K2r w - - 0 1",
+                    "4k3/8/8/8/1b6/8/8/4K2r w - - 0 1",
+                    "4k3/4r3/8/8/8/8/4B3/4K3 w - - 0 1",
+                    "4k3/8/8/2Pp4/8/8/8/4K3 w - d6 0 1",
+                    "8/8/8/8/k2Pp2Q/8/8/3K4 b - d3 0 1",
+                    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"):
+            mailbox = Board()
+            mailbox.set_fen(fen)
+            self.board.set_fen(fen)
+            self.assertEqual(sorted(self.board.movegen.generate_moves()),
+                             sorted(mailbox.movegen.generate_moves()), fen)
+            self.assertEqual(sorted(self.board.movegen.generate_captures()),
+                             sorted(mailbox.movegen.generate_captures()), fen)
+
+    def test_identical_search(self):
+        results = []
+        for board in (Board(), BitboardBoard()):
+            for move in [(85, 65, 0), (35, 55, 0), (97, 76, 0), (22, 43, 0)]:
+                board.make_move(move)
+            results.append(SearchEngine(board).search(3))
+        self.assertEqual(results[0], results[1])
@@ -1,5 +1,6 @@
+import pickle
 import unittest
-from engine.board import Board
+from engine.board import Board, START_FEN, decode_move, move_to_uci
 from engine.constants import *
 
 class TestBoard(unittest.TestCase):
@@ -26,6 +27,7 @@ class TestBoard(unittest.TestCase):
         # Test capture
         self.board.board[41] = PAWN
         self.board.color[41] = BLACK
+        self.board.refresh_state()
         self.board.make_move((61, 41, 0))  # e4xe5
         self.assertEqual(self.board.board[41], PAWN)
         self.assertEqual(self.board.color[41], WHITE)
@@ -43,3 +45,191 @@ class TestBoard(unittest.TestCase):
         self.board.make_move((81, 61, 0))  # e2-e4
         self.board.make_move((31, 51, 0))  # e7-e5
         self.assertEqual(self.board.ep_square, 51)
+
+    def test_zobrist_hash(self):
+        start_hash = self.board.hash
+        self.assertEqual(start_hash, self.board.compute_hash())
+
+        # Incremental key matches a full recompute after every move
+        for move in [(97, 76, 0), (27, 46, 0), (76, 97, 0)]:
+            self.board.make_move(move)
+            self.assertEqual(self.board.hash, self.board.compute_hash())
+
+        # Same placement with a different side to move must not collide
+        self.assertNotEqual(self.board.hash, start_hash)
+
+        # Transposing back to the initial position restores the initial key
+        self.board.make_move((46, 27, 0))
+        self.assertEqual(self.board.hash, start_hash)
+
+    def test_zobrist_hash_special_moves(self):
+        # Double push sets an en passant square that is part of the key
+        self.board.make_move((85, 65, 0))  # e2-e4
+        self.assertEqual(self.board.ep_square, 75)
+        self.assertEqual(self.board.hash, self.board.compute_hash())
+
+        # Losing castling rights changes the key
+        self.board.make_move((35, 55, 0))  # e7-e5
+        self.board.make_move((95, 85, 0))  # Ke1-e2
+        self.assertEqual(self.board.castling_rights[WHITE], (False, False))
+        self.assertIsNone(self.board.ep_square)
+        self.assertEqual(self.board.hash, self.board.compute_hash())
+
+    def test_pawn_hash(self):
+        start_pawn_hash = self.board.pawn_hash
+        # Piece moves leave the pawn key alone; pawn moves, captures and promotions change it
+        self.board.make_move((97, 76, 0))  # Nf3
+        self.assertEqual(self.board.pawn_hash, start_pawn_hash)
+        self.board.make_move((34, 54, 0))  # d5
+        self.assertNotEqual(self.board.pawn_hash, start_pawn_hash)
+        pawn_hash = self.board.pawn_hash
+        self.board.refresh_state()
+        self.assertEqual(self.board.pawn_hash, pawn_hash)
+
+        self.board.unmake_move()
+        self.board.unmake_move()
+        self.assertEqual(self.board.pawn_hash, start_pawn_hash)
+
+    def test_packed_moves(self):
+        move = self.board.parse_move("e2e4")
+        self.assertEqual(decode_move(move), (85, 65, 0))
+        self.assertTrue(move & MOVE_DOUBLE_PUSH)
+        self.assertEqual(move_to_uci(move), "e2e4")
+
+        # Flags are read off the position the move is packed for
+        self.board.set_fen("r3k2r/8/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1")
+        self.assertTrue(self.board.parse_move("e1g1") & MOVE_CASTLE)
+        self.assertTrue(self.board.parse_move("e5d6") & MOVE_EN_PASSANT)
+        self.assertTrue(self.board.parse_move("a1a8") & MOVE_CAPTURE)
+        self.assertIn(self.board.parse_move("e1c1"), self.board.movegen.generate_moves())
+
+    def test_see(self):
+        # Undefended pawn
+        self.board.set_fen("1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1")
+        self.assertEqual(self.board.see(self.board.pack_move((95, 55, 0))), 100)
+
+        # Knight takes a pawn that is defended twice, with x-rays on both sides
+        self.board.set_fen("1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1")
+        self.assertEqual(self.board.see(self.board.pack_move((74, 55, 0))), 100 - 320)
+
+        # Queen for a pawn
+        self.board.set_fen("4k3/8/3p4/4p3/8/8/8/4QK2 w - - 0 1")
+        self.assertEqual(self.board.see(self.board.pack_move((95, 55, 0))), 100 - 900)
+
+        # En passant removes the pawn behind the target square
+        self.board.set_fen("4k3/8/8/3pP3/8/8/8/4K3 w - - 0 1")
+        self.board.ep_square = 44
+        self.assertEqual(self.board.see(self.board.pack_move((55, 44, 0))), 100)
+
+    def test_get_fen(self):
+        self.assertEqual(self.board.get_fen(), START_FEN)
+        self.board.make_move((85, 65, 0))  # e4
+        self.board.make_move((33, 53, 0))  # c5
+        self.board.make_move((97, 76, 0))  # Nf3
+        self.assertEqual(self.board.get_fen(),
+                         "rnbqkbnr/pp1ppppp/8/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2")
+
+    def test_from_fen(self):
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b Kq e3 3 17"
+        board = Board.from_fen(fen)
+        self.assertEqual(board.get_fen(), fen)
+        self.assertEqual(board.ep_square, 75)
+        self.assertEqual(board.castling_rights, {WHITE: (True, False), BLACK: (False, True)})
+
+        # The one-pass setup matches a full rebuild of every derived field
+        state = (board.hash, board.pawn_hash, list(board.material), list(board.pst_score))
+        board.refresh_state()
+        self.assertEqual((board.hash, board.pawn_hash, board.material, board.pst_score), state)
+        self.assertEqual(len(board.movegen.generate_moves()), 42)
+
+    def test_invalid_fen(self):
+        for fen in ["", "8/8/8 w - - 0 1", "9/8/8/8/8/8/8/8 w - - 0 1",
+                    "rnbqkbnrr/8/8/8/8/8/8/8 w - - 0 1", "x7/8/8/8/8/8/8/8 w - - 0 1",
+                    "4k3/8/8/8/8/8/8/4K3 x - - 0 1"]:
+            with self.assertRaises(ValueError):
+                self.board.set_fen(fen)
+        self.assertEqual(self.board.get_fen(), START_FEN)
+
+    def test_pickle(self):
+        for move in [(85, 65, 0), (35, 55, 0), (97, 76, 0)]:
+            self.board.make_move(move)
+        self.assertFalse(hasattr(self.board, '__dict__'))
+        copy = pickle.loads(pickle.dumps(self.board))
+        self.assertEqual(copy.get_fen(), self.board.get_fen())
+        self.assertEqual((copy.hash, copy.castling), (self.board.hash, self.board.castling))
+
+        # The copy plays on and unwinds independently of the original
+        self.assertIs(copy.movegen.board, copy)
+        self.assertEqual(sorted(copy.movegen.generate_moves()),
+                         sorted(self.board.movegen.generate_moves()))
+        while copy.undo_stack:
+            copy.unmake_move()
+        self.assertEqual(copy.get_fen(), START_FEN)
+
+    def test_castling_rights_view(self):
+        self.board.castling_rights = {WHITE: (True, False), BLACK: (False, True)}
+        self.assertEqual(self.board.castling, WHITE_KINGSIDE | BLACK_QUEENSIDE)
+        self.assertEqual(self.board.hash, self.board.compute_hash())
+        self.assertEqual(self.board.get_fen().split()[2], "Kq")
+
+    def snapshot(self):
+        return (list(self.board.board), list(self.board.color), dict(self.board.castling_rights),
+                self.board.ep_square, self.board.side_to_move, self.board.halfmove_clock,
+                self.board.fullmove_number, self.board.hash)
+
+    def test_unmake_move(self):
+        # e4 a6 e5 d5 exd6 e.p., undone one move at a time
+        moves = [(85, 65, 0), (31, 41, 0), (65, 55, 0), (34, 54, 0), (55, 44, 0)]
+        states = []
+        for move in moves:
+            states.append(self.snapshot())
+            self.board.make_move(move)
+        self.assertEqual(self.board.board[54], EMPTY)  # captured en passant
+
+        for state in reversed(states):
+            self.board.unmake_move()
+            self.assertEqual(self.snapshot(), state)
+        self.assertEqual(self.board.undo_stack, [])
+
+    def test_unmake_castling_and_promotion(self):
+        self.board.board[96] = EMPTY
+        self.board.board[97] = EMPTY
+        self.board.board[32] = EMPTY
+        self.board.board[82] = EMPTY
+        self.board.board[22] = EMPTY
+        self.board.board[32] = PAWN
+        self.board.color[32] = WHITE
+        self.board.refresh_state()
+        before = self.snapshot()
+
+        self.board.make_move((95, 97, 0))  # O-O
+        self.assertEqual(self.board.board[96], ROOK)
+        self.board.make_move((31, 41, 0))
+        self.board.make_move((32, 21, QUEEN))  # bxa8=Q
+        self.assertEqual(self.board.board[21], QUEEN)
+        self.assertEqual(self.board.hash, self.board.compute_hash())
+
+        for _ in range(3):
+            self.board.unmake_move()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_piece_lists(self):
+        self.assertEqual(sorted(self.board.piece_lists[WHITE][PAWN]), list(range(81, 89)))
+        self.assertEqual(self.board.king_square(BLACK), 25)
+
+        # e4 d5 exd5 Qxd5 O-O-O style churn, then compare against a rebuild
+        moves = [(85, 65, 0), (34, 54, 0), (65, 54, 0), (24, 54, 0), (97, 76, 0)]
+        for move in moves:
+            self.board.make_move(move)
+        lists = {color: {piece: sorted(sqs) for piece, sqs in pieces.items()}
+                 for color, pieces in self.board.piece_lists.items()}
+        self.assertNotIn(54, self.board.piece_lists[WHITE][PAWN])
+        self.assertIn(54, self.board.piece_lists[BLACK][QUEEN])
+        self.board.refresh_state()
+        self.assertEqual({color: {piece: sorted(sqs) for piece, sqs in pieces.items()}
+                          for color, pieces in self.board.piece_lists.items()}, lists)
+
+        for _ in moves:
+            self.board.unmake_move()
+        self.assertEqual(sorted(self.board.piece_lists[BLACK][PAWN]), list(range(31, 39)))
+        self.assertEqual(self.board.piece_lists[BLACK][QUEEN], [24])
@@ -0,0 +1,106 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+import chess
+import chess.polyglot
+from engine.board import Board, move_to_uci
+from engine.book import OpeningBook, build_book, polyglot_key
+from engine.search import SearchEngine
+
+PGN = """[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4. O-O Nf6 1-0
+
+[Result "1/2-1/2"]
+
+1. e4 e5 2. Nf3 Nf6 3. d4 exd4 1/2-1/2
+
+[Result "0-1"]
+
+1. d4 d5 2. c4 e6 3. Nc3 Nf6 0-1
+
+[Result "1-0"]
+
+1. e4 c5 2. Nf3 d6 3. d4 cxd4 1-0
+"""
+
+
+class TestOpeningBook(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "book.bin")
+        with open(self.path, "wb") as output:
+            self.entries = build_book(io.StringIO(PGN), output, max_ply=8)
+        self.book = OpeningBook(self.path, mode="best")
+
+    def tearDown(self):
+        self.book.close()
+        self.tmp.cleanup()
+
+    def test_polyglot_key(self):
+        board = Board()
+        self.assertEqual(polyglot_key(board), 0x463B96181691FC9C)
+
+        # Random games cover castling rights and hashed/unhashed en passant
+        rng = random.Random(7)
+        for _ in range(20):
+            game = chess.Board()
+            board.set_fen(game.fen())
+            for _ in range(40):
+                moves = list(game.legal_moves)
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                game.push(move)
+                board.make_move(board.parse_move(move.uci()))
+                self.assertEqual(polyglot_key(board), chess.polyglot.zobrist_hash(game))
+
+    def test_build_matches_python_chess_reader(self):
+        # python-chess reads the file back: keys, castling encoding and weights
+        with chess.polyglot.open_reader(self.path) as reader:
+            entries = list(reader.find_all(chess.Board(), minimum_weight=0))
+            self.assertEqual([(e.move.uci(), e.weight) for e in entries],
+                             [("e2e4", 5), ("d2d4", 0)])
+            game = chess.Board("r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+            self.assertEqual([e.move.uci() for e in reader.find_all(game)], ["e1g1"])
+        self.assertEqual(len(self.book), self.entries)
+
+    def test_bounded_memory_build(self):
+        # Spilling runs of two moves and merging them gives the same book
+        output = io.BytesIO()
+        self.assertEqual(build_book(io.StringIO(PGN), output, max_ply=8, run_entries=2),
+                         self.entries)
+        with open(self.path, "rb") as f:
+            self.assertEqual(output.getvalue(), f.read())
+
+        # Moves from fewer games are dropped
+        output = io.BytesIO()
+        build_book(io.StringIO(PGN), output, max_ply=8, min_games=2)
+        self.assertLess(len(output.getvalue()) // 16, self.entries)
+
+    def test_probe(self):
+        board = Board()
+        self.assertEqual(move_to_uci(self.book.choose(board)), "e2e4")
+        board.make_move(board.parse_move("e2e4"))
+        self.assertEqual({move_to_uci(m) for m, _ in self.book.moves(board)}, {"e7e5", "c7c5"})
+
+        # The weighted mode never picks a weight-zero move
+        board.set_fen("r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+        weighted = OpeningBook(self.path, rng=random.Random(1))
+        self.assertEqual(move_to_uci(weighted.choose(board)), "e1g1")
+        board.set_fen("8/8/8/8/8/8/8/K6k w - - 0 1")
+        self.assertIsNone(weighted.choose(board))
+        weighted.close()
+
+    def test_search_plays_book_moves(self):
+        board = Board()
+        engine = SearchEngine(board, hash_mb=1, book=self.book)
+        score, move = engine.search(depth=4)
+        self.assertEqual((move_to_uci(move), engine.nodes), ("e2e4", 0))
+
+        # Out of book the search runs as usual
+        board.set_fen("8/8/8/8/8/8/8/K6k w - - 0 1")
+        score, move = engine.search(depth=2)
+        self.assertGreater(engine.nodes, 0)
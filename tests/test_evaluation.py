@@ -25,6 +25,7 @@ class TestEvaluation(unittest.TestCase):
         self.board.color[25] = WHITE
         self.board.color[95] = BLACK
         self.board.color[45] = WHITE
+        self.board.refresh_state()
         
         score = self.evaluator.evaluate(self.board)
         self.assertTrue(score > 800)  # Queen value is 900
@@ -40,6 +41,7 @@ class TestEvaluation(unittest.TestCase):
         self.board.board[21] = KNIGHT  # Corner knight
         self.board.color[44] = WHITE
         self.board.color[21] = BLACK
+        self.board.refresh_state()
         
         score = self.evaluator.evaluate(self.board)
         self.assertTrue(score > 0)  # Central knight should be better
@@ -57,6 +59,89 @@ class TestEvaluation(unittest.TestCase):
         self.board.color[95] = BLACK
         self.board.color[24] = WHITE
         self.board.color[26] = WHITE
+        self.board.refresh_state()
         
         score = self.evaluator.evaluate(self.board)
         self.assertTrue(score > 0)  # Protected king should be better
+
+    def test_incremental_matches_full_scan(self):
+        # Material/PST sums after make/unmake equal a fresh rebuild
+        moves = [(85, 65, 0), (34, 54, 0), (65, 54, 0), (24, 54, 0), (97, 76, 0)]
+        for move in moves:
+            self.board.make_move(move)
+        material, pst = list(self.board.material), list(self.board.pst_score)
+        self.board.refresh_state()
+        self.assertEqual(self.board.material, material)
+        self.assertEqual(self.board.pst_score, pst)
+
+        for _ in moves:
+            self.board.unmake_move()
+        self.assertEqual(self.board.material, Board().material)
+        self.assertEqual(self.board.pst_score, Board().pst_score)
+
+    def test_mobility(self):
+        # Symmetric start: only the knights can move, 2 squares each
+        self.assertEqual(self.board.count_mobility(WHITE), 4)
+        self.assertEqual(self.evaluator.evaluate_mobility(self.board), 0)
+
+        # e4 opens the bishop and queen; evaluating does not touch the side to move
+        self.board.make_move((85, 65, 0))
+        side = self.board.side_to_move
+        self.assertEqual(self.evaluator.evaluate_mobility(self.board), (5 + 5 + 4 - 4) * 10)
+        self.assertEqual(self.board.side_to_move, side)
+
+    def test_mobility_backends_agree(self):
+        from engine.bitboard import BitboardBoard
+        from engine.perft import STANDARD_POSITIONS
+        for _, fen, _ in STANDARD_POSITIONS:
+            mailbox, bitboard = Board(), BitboardBoard()
+            mailbox.set_fen(fen)
+            bitboard.set_fen(fen)
+            for color in (WHITE, BLACK):
+                self.assertEqual(mailbox.count_mobility(color), bitboard.count_mobility(color))
+
+    def test_eval_cache(self):
+        self.board.make_move((85, 65, 0))
+        score = self.evaluator.evaluate(self.board)
+        self.assertEqual((self.evaluator.cache_hits, self.evaluator.cache_misses), (0, 1))
+
+        # Same position again, reached by a different route, is a hit
+        self.board.unmake_move()
+        self.board.make_move((85, 75, 0))
+        self.board.unmake_move()
+        self.board.make_move((85, 65, 0))
+        self.assertEqual(self.evaluator.evaluate(self.board), score)
+        self.assertEqual(self.evaluator.cache_hits, 1)
+        self.assertEqual(score, self.evaluator.evaluate_uncached(self.board))
+
+    def test_eval_cache_size(self):
+        self.assertEqual(len(Evaluator(1000).cache_keys), 512)
+        uncached = Evaluator(0)
+        uncached.evaluate(self.board)
+        self.assertEqual((uncached.cache_hits, uncached.cache_misses), (0, 0))
+
+    def test_pawn_structure(self):
+        self.assertEqual(self.evaluator.compute_pawn_structure(self.board), 0)
+
+        # White: doubled, isolated c-pawns and an isolated passer on g6;
+        # black: a passed a7 and a b7 held back by the c-pawns
+        self.board.set_fen("4k3/pp6/6P1/8/2P5/2P5/8/4K3 w - - 0 1")
+        white = -DOUBLED_PAWN_PENALTY - 3 * ISOLATED_PAWN_PENALTY + PASSED_PAWN_BONUS[5]
+        self.assertEqual(self.evaluator.compute_pawn_structure(self.board),
+                         white - PASSED_PAWN_BONUS[1])
+
+        # Backward: e3's neighbour has advanced and d5 covers its stop square
+        self.board.set_fen("4k3/8/8/3p4/5P2/4P3/8/4K3 w - - 0 1")
+        white = -BACKWARD_PAWN_PENALTY + PASSED_PAWN_BONUS[3]
+        black = -ISOLATED_PAWN_PENALTY
+        self.assertEqual(self.evaluator.compute_pawn_structure(self.board), white - black)
+
+    def test_pawn_cache(self):
+        evaluator = Evaluator(0)
+        self.board.make_move((85, 65, 0))
+        score = evaluator.evaluate_pawn_structure(self.board)
+        # Piece moves keep the pawn key, so they hit the pawn table
+        for move in [(22, 43, 0), (97, 76, 0), (27, 46, 0)]:
+            self.board.make_move(move)
+            self.assertEqual(evaluator.evaluate_pawn_structure(self.board), score)
+        self.assertEqual((evaluator.pawn_hits, evaluator.pawn_misses), (3, 1))
@@ -44,6 +44,7 @@ class TestGameEnd(unittest.TestCase):
         self.board.color[95] = WHITE
         self.board.color[31] = WHITE
         self.board.side_to_move = BLACK
+        self.board.refresh_state()
         
         # Verify stalemate
         moves = self.movegen.generate_moves()
@@ -59,6 +60,7 @@ class TestGameEnd(unittest.TestCase):
         self.board.board[95] = KING
         self.board.color[25] = WHITE
         self.board.color[95] = BLACK
+        self.board.refresh_state()
         
         # Both sides should still have legal moves
         self.board.side_to_move = WHITE
@@ -1,5 +1,5 @@
 import unittest
-from engine.board import Board
+from engine.board import Board, decode_move
 from engine.movegen import MoveGenerator
 from engine.constants import *
 
@@ -62,3 +62,27 @@ class TestMoveGenerator(unittest.TestCase):
         moves = self.movegen.generate_king_moves(25)
         castle_kingside = (25, 27, 0)
         self.assertIn(castle_kingside, moves)
+
+    def test_pinned_piece(self):
+        # White knight on e2 pinned by a black rook on e5 against the king on e1
+        self.board.board[85] = KNIGHT
+        self.board.board[55] = ROOK
+        self.board.color[55] = BLACK
+        self.board.refresh_state()
+        moves = self.movegen.generate_moves()
+        self.assertFalse([m for m in moves if decode_move(m)[0] == 85])
+
+    def test_check_evasions(self):
+        # Fool's mate: f3 e5 g4 Qh4# leaves white without a legal move
+        for move in [(86, 76, 0), (35, 55, 0), (87, 67, 0), (24, 68, 0)]:
+            self.board.make_move(move)
+        self.assertTrue(self.board.in_check())
+        self.assertEqual(self.movegen.generate_moves(), [])
+
+        # Single check that can be blocked: only blocks, captures or king moves
+        self.board = Board()
+        self.movegen = MoveGenerator(self.board)
+        for move in [(85, 65, 0), (36, 46, 0), (94, 58, 0)]:  # e4 f6 Qh5+
+            self.board.make_move(move)
+        moves = self.movegen.generate_moves()
+        self.assertEqual([decode_move(m) for m in moves], [(37, 47, 0)])  # g6 is the only reply
@@ -0,0 +1,63 @@
+import unittest
+from unittest import mock
+from engine.board import Board, encode_move, decode_move
+from engine.movegen import MoveGenerator
+from engine.movepick import MovePicker
+from engine.perft import STANDARD_POSITIONS
+from engine.constants import *
+
+class TestMovePicker(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+        self.board.set_fen(STANDARD_POSITIONS[1][1])  # Kiwipete
+        self.movegen = self.board.movegen
+        self.history = [0] * (MOVE_FROM_TO_MASK + 1)
+
+    def test_yields_every_legal_move_once(self):
+        legal = sorted(self.movegen.generate_moves())
+        killers = [encode_move(92, 81), encode_move(21, 22)]  # second one is not legal here
+        picked = list(MovePicker(self.movegen, self.history, legal[5], killers))
+        self.assertEqual(sorted(picked), legal)
+        self.assertEqual(picked[0], legal[5])
+
+    def test_stage_order(self):
+        captures = self.movegen.generate_captures()
+        good = [m for m in captures if self.board.see(m) >= 0]
+        bad = [m for m in captures if self.board.see(m) < 0]
+        self.assertTrue(bad)
+        quiets = self.movegen.generate_quiets()
+        killer = quiets[-1]
+        picked = list(MovePicker(self.movegen, self.history, None, [killer, None]))
+
+        # Winning and even captures, the killer, the remaining quiets, then losing captures
+        self.assertEqual(sorted(picked[:len(good)]), sorted(good))
+        self.assertEqual(picked[len(good)], killer)
+        self.assertEqual(sorted(picked[-len(bad):]), sorted(bad))
+
+        # Highest value victim first
+        first = picked[0]
+        self.assertEqual(max(PIECE_VALUES[self.board.board[decode_move(m)[1]]] for m in good
+                             if self.board.board[decode_move(m)[1]] > EMPTY),
+                         PIECE_VALUES[self.board.board[decode_move(first)[1]]])
+
+    def test_illegal_hash_move_is_skipped(self):
+        picked = list(MovePicker(self.movegen, self.history, encode_move(21, 31)))
+        self.assertNotIn(encode_move(21, 31), picked)
+
+    def test_lazy_generation(self):
+        hash_move = self.movegen.generate_quiets()[0]
+
+        # Stopping after the hash move never generates the quiet stage
+        with mock.patch.object(MoveGenerator, 'generate_quiets', autospec=True,
+                               side_effect=MoveGenerator.generate_quiets) as generate_quiets:
+            for move in MovePicker(self.movegen, self.history, hash_move):
+                break
+        generate_quiets.assert_not_called()
+
+    def test_captures_and_quiets_partition_moves(self):
+        for _, fen, _ in STANDARD_POSITIONS:
+            self.board.set_fen(fen)
+            captures = self.movegen.generate_captures()
+            quiets = self.movegen.generate_quiets()
+            self.assertEqual(sorted(captures + quiets), sorted(self.movegen.generate_moves()))
+            self.assertTrue(all(self.movegen.is_tactical(m) for m in captures))
@@ -0,0 +1,40 @@
+import unittest
+from engine.board import Board
+from engine.bitboard import BitboardBoard
+from engine.perft import STANDARD_POSITIONS, perft, divide, reference_divide, diff_divide
+
+try:
+    import chess
+except ImportError:
+    chess = None
+
+class TestPerft(unittest.TestCase):
+    def test_standard_positions(self):
+        for board_class in (Board, BitboardBoard):
+            for name, fen, expected in STANDARD_POSITIONS:
+                board = board_class()
+                board.set_fen(fen)
+                for depth in (1, 2):
+                    self.assertEqual(perft(board, depth), expected[depth - 1],
+                                     f"{board_class.__name__} {name} depth {depth}")
+
+    def test_startpos_depth_3(self):
+        self.assertEqual(perft(Board(), 3), 8902)
+
+    def test_perft_restores_position(self):
+        board = Board()
+        board.set_fen(STANDARD_POSITIONS[1][1])
+        before = (list(board.board), list(board.color), board.hash)
+        perft(board, 3)
+        self.assertEqual((list(board.board), list(board.color), board.hash), before)
+
+    def test_divide_across_processes(self):
+        board = Board()
+        self.assertEqual(divide(board, 3, processes=2), divide(board, 3))
+
+    @unittest.skipUnless(chess, "python-chess not installed")
+    def test_divide_matches_python_chess(self):
+        for name, fen, _ in STANDARD_POSITIONS:
+            board = Board()
+            board.set_fen(fen)
+            self.assertEqual(diff_divide(divide(board, 2), reference_divide(fen, 2)), [], name)
@@ -1,6 +1,8 @@
 import unittest
-from engine.board import Board
-from engine.search import SearchEngine
+from unittest import mock
+from engine.board import Board, decode_move
+from engine.perft import STANDARD_POSITIONS
+from engine.search import SearchEngine, MAX_DEPTH, score_to_tt, score_from_tt
 from engine.constants import *
 
 class TestSearch(unittest.TestCase):
@@ -43,7 +45,7 @@ class TestSearch(unittest.TestCase):
         self.board.side_to_move = WHITE
         
         score, best_move = self.search_engine.search(3)
-        self.assertEqual(best_move[1], 56)  # Should capture the queen
+        self.assertEqual(decode_move(best_move)[1], 56)  # Should capture the queen
         
     def test_depth_effect(self):
         # Test if deeper search produces different/better moves
@@ -71,3 +73,84 @@ class TestSearch(unittest.TestCase):
         nodes2 = self.search_engine.nodes
         
         self.assertTrue(nodes2 < nodes1)  # Should use cached positions
+
+    def test_quiescence_skips_losing_captures(self):
+        # Qxe5 loses the queen to d6xe5, so quiescence keeps the stand-pat score
+        self.board.set_fen("4k3/8/3p4/4p3/8/8/8/4QK2 w - - 0 1")
+        engine = SearchEngine(self.board)
+        stand_pat = engine.evaluator.evaluate(self.board)
+        self.assertEqual(engine.quiescence(-30000, 30000), stand_pat)
+        self.assertEqual(engine.nodes, 1)
+
+    def test_mate_scores(self):
+        # Mate scores count plies from the root: Rd8# is 1, Rd8+ Rxd8 Rxd8# is 3
+        self.board.set_fen("6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1")
+        self.assertEqual(self.search_engine.search(3)[0], MATE_SCORE - 1)
+        self.board.set_fen("r5k1/5ppp/8/8/8/8/3R1PPP/3R2K1 w - - 0 1")
+        self.assertEqual(self.search_engine.search(4)[0], MATE_SCORE - 3)
+
+        # Table entries stored deeper in the tree still read as mate in 3 at the root
+        scores = []
+        self.search_engine.info_callback = lambda info: scores.append(info['score'])
+        self.assertEqual(self.search_engine.search(4)[0], MATE_SCORE - 3)
+        self.assertEqual(scores[1], MATE_SCORE - 3)
+        for ply in (0, 5):
+            for score in (MATE_SCORE - 7, 7 - MATE_SCORE, 150):
+                self.assertEqual(score_from_tt(score_to_tt(score, ply), ply), score)
+
+    def test_aspiration_windows(self):
+        # Windows too narrow for any score fail and are widened until the
+        # search agrees with a full-window one
+        for _, fen, _ in STANDARD_POSITIONS[3:]:
+            results = []
+            for window, depth in ((1, 2), (50, MAX_DEPTH)):
+                with mock.patch('engine.search.ASPIRATION_WINDOW', window), \
+                        mock.patch('engine.search.ASPIRATION_DEPTH', depth):
+                    self.board.set_fen(fen)
+                    results.append(SearchEngine(self.board, hash_mb=1).search(4))
+            self.assertEqual(results[0], results[1])
+
+    def test_iterative_deepening(self):
+        depths = []
+        self.search_engine.info_callback = lambda info: depths.append(info['depth'])
+        score, best_move = self.search_engine.search(3)
+        self.assertEqual(depths, [1, 2, 3])
+        self.assertEqual(self.search_engine.depth_reached, 3)
+        self.assertEqual(self.search_engine.pv[0], best_move)
+
+    def test_movetime_limit(self):
+        import time
+        start = time.perf_counter()
+        score, best_move = self.search_engine.search(movetime=200)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIsNotNone(best_move)
+        self.assertEqual(self.board.undo_stack, [])  # aborted iteration was unwound
+
+    def test_node_limit(self):
+        score, best_move = self.search_engine.search(nodes=2000)
+        self.assertIsNotNone(best_move)
+        self.assertLess(self.search_engine.nodes, 2000 + 1024)
+
+    def test_stop_flag(self):
+        import threading
+        timer = threading.Timer(0.2, self.search_engine.stop)
+        timer.start()
+        score, best_move = self.search_engine.search()  # no limits: runs until stopped
+        timer.join()
+        self.assertIsNotNone(best_move)
+        self.assertIn(best_move, self.board.movegen.generate_moves())
+
+    def test_parallel_search(self):
+        # Helpers never fork the (multithreaded) caller
+        from engine.smp import HELPER_CONTEXT
+        self.assertNotEqual(HELPER_CONTEXT.get_start_method(), "fork")
+        engine = SearchEngine(self.board, hash_mb=1, threads=2)
+        try:
+            self.assertIsNotNone(engine.shared_memory)
+            score, best_move = engine.search(3)
+            self.assertIn(best_move, self.board.movegen.generate_moves())
+            self.assertEqual(engine.depth_reached, 3)
+            self.assertEqual(self.board.undo_stack, [])
+        finally:
+            engine.close()
+        self.assertIsNone(engine.shared_memory)
@@ -1,5 +1,5 @@
 import unittest
-from engine.board import Board
+from engine.board import Board, decode_move
 from engine.movegen import MoveGenerator
 from engine.constants import *
 
@@ -9,43 +9,57 @@ class TestSpecialMoves(unittest.TestCase):
         self.movegen = MoveGenerator(self.board)
         
     def test_castling_kingside(self):
-        # Setup castling position
-        self.board.board[25] = KING
-        self.board.board[28] = ROOK
-        self.board.board[26] = EMPTY
-        self.board.board[27] = EMPTY
-        self.board.color[25] = WHITE
-        self.board.color[28] = WHITE
+        # Clear f1 and g1 between the white king and rook
+        self.board.board[96] = EMPTY
+        self.board.board[97] = EMPTY
         self.board.side_to_move = WHITE
+        self.board.refresh_state()
         
-        moves = self.movegen.generate_moves()
-        castle_move = (25, 27, 0)  # e1-g1
+        moves = [decode_move(m) for m in self.movegen.generate_moves()]
+        castle_move = (95, 97, 0)  # e1-g1
         self.assertIn(castle_move, moves)
         
         # Test castling execution
         self.board.make_move(castle_move)
-        self.assertEqual(self.board.board[27], KING)
-        self.assertEqual(self.board.board[26], ROOK)
+        self.assertEqual(self.board.board[97], KING)
+        self.assertEqual(self.board.board[96], ROOK)
         
     def test_castling_queenside(self):
-        # Setup castling position
-        self.board.board[25] = KING
-        self.board.board[21] = ROOK
-        self.board.board[22] = EMPTY
-        self.board.board[23] = EMPTY
-        self.board.board[24] = EMPTY
-        self.board.color[25] = WHITE
-        self.board.color[21] = WHITE
+        # Clear b1, c1 and d1 between the white king and rook
+        self.board.board[92] = EMPTY
+        self.board.board[93] = EMPTY
+        self.board.board[94] = EMPTY
         self.board.side_to_move = WHITE
+        self.board.refresh_state()
         
-        moves = self.movegen.generate_moves()
-        castle_move = (25, 23, 0)  # e1-c1
+        moves = [decode_move(m) for m in self.movegen.generate_moves()]
+        castle_move = (95, 93, 0)  # e1-c1
         self.assertIn(castle_move, moves)
         
         # Test castling execution
         self.board.make_move(castle_move)
-        self.assertEqual(self.board.board[23], KING)
-        self.assertEqual(self.board.board[24], ROOK)
+        self.assertEqual(self.board.board[93], KING)
+        self.assertEqual(self.board.board[94], ROOK)
+
+    def test_no_castling_through_check(self):
+        # Black rook on f-file covers f1, which the king would pass through
+        self.board.board[96] = EMPTY
+        self.board.board[97] = EMPTY
+        self.board.board[86] = EMPTY
+        self.board.board[36] = ROOK
+        self.board.refresh_state()
+
+        moves = [decode_move(m) for m in self.movegen.generate_moves()]
+        self.assertNotIn((95, 97, 0), moves)
+
+        # Nor out of check
+        self.board.board[36] = EMPTY
+        self.board.board[85] = EMPTY
+        self.board.board[45] = ROOK
+        self.board.color[45] = BLACK
+        self.board.refresh_state()
+        moves = [decode_move(m) for m in self.movegen.generate_moves()]
+        self.assertNotIn((95, 97, 0), moves)
         
     def test_en_passant(self):
         # Setup en passant position
@@ -55,8 +69,9 @@ class TestSpecialMoves(unittest.TestCase):
         self.board.color[52] = BLACK
         self.board.side_to_move = BLACK
         self.board.ep_square = 61
+        self.board.refresh_state()
         
-        moves = self.movegen.generate_moves()
+        moves = [decode_move(m) for m in self.movegen.generate_moves()]
         ep_move = (52, 61, 0)  # d4xe3
         self.assertIn(ep_move, moves)
         
@@ -70,8 +85,9 @@ class TestSpecialMoves(unittest.TestCase):
         self.board.board[31] = PAWN  # e7
         self.board.color[31] = WHITE
         self.board.side_to_move = WHITE
+        self.board.refresh_state()
         
-        moves = self.movegen.generate_moves()
+        moves = [decode_move(m) for m in self.movegen.generate_moves()]
         promotion_moves = [
             (31, 21, QUEEN),  # e7-e8=Q
             (31, 21, ROOK),   # e7-e8=R
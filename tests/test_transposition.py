@@ -0,0 +1,71 @@
+import unittest
+from engine.board import encode_move
+from engine.constants import *
+from engine.transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+class TestTranspositionTable(unittest.TestCase):
+    def setUp(self):
+        self.tt = TranspositionTable(1)
+
+    def test_size_is_bounded(self):
+        # 1 MB worth of 32-byte buckets, allocated up front
+        self.assertEqual(self.tt.num_buckets, 1 << 15)
+        self.assertEqual(len(self.tt.table) * self.tt.table.itemsize, 1024 * 1024)
+        for key in range(100000):
+            self.tt.store(key * 7919, 1, 0, EXACT)
+        self.assertEqual(len(self.tt.table) * self.tt.table.itemsize, 1024 * 1024)
+
+    def test_store_and_probe(self):
+        key = 0x1234567890ABCDEF
+        self.assertIsNone(self.tt.probe(key))
+        move = encode_move(85, 65, 0, MOVE_DOUBLE_PUSH)
+        self.tt.store(key, 5, -137, LOWER, move)
+        self.assertEqual(self.tt.probe(key), (-137, 5, LOWER, move))
+
+        # Promotion captures round-trip too, flags and all
+        move = encode_move(31, 22, QUEEN, MOVE_CAPTURE)
+        self.tt.store(key, 6, 900, EXACT, move)
+        self.assertEqual(self.tt.probe(key), (900, 6, EXACT, move))
+
+    def test_keeps_best_move_without_new_one(self):
+        key = 42
+        self.tt.store(key, 3, 10, EXACT, encode_move(97, 76))
+        self.tt.store(key, 4, -20, UPPER)
+        self.assertEqual(self.tt.probe(key), (-20, 4, UPPER, encode_move(97, 76)))
+
+    def test_replacement_policy(self):
+        # Two keys mapping to the same bucket
+        deep = 5
+        shallow = 5 + self.tt.num_buckets
+        self.tt.store(deep, 8, 1, EXACT)
+        self.tt.store(shallow, 2, 2, EXACT)
+
+        # The deep entry stays in the depth-preferred slot, the shallow one goes to always-replace
+        self.assertEqual(self.tt.probe(deep)[1], 8)
+        self.assertEqual(self.tt.probe(shallow)[1], 2)
+
+        # Entries from an older search lose their depth priority
+        self.tt.new_search()
+        other = 5 + 2 * self.tt.num_buckets
+        self.tt.store(other, 1, 3, EXACT)
+        self.assertIsNone(self.tt.probe(deep))
+        self.assertEqual(self.tt.probe(other)[1], 1)
+
+    def test_shared_buffer(self):
+        from multiprocessing.shared_memory import SharedMemory
+        from engine.transposition import table_bytes
+        shared = SharedMemory(create=True, size=table_bytes(1))
+        try:
+            # Two tables over one buffer see each other's entries
+            first = TranspositionTable(buffer=shared.buf)
+            second = TranspositionTable(buffer=shared.buf)
+            self.assertEqual(first.num_buckets, self.tt.num_buckets)
+            first.store(0xABCDEF, 4, 25, EXACT, encode_move(85, 65))
+            self.assertEqual(second.probe(0xABCDEF), (25, 4, EXACT, encode_move(85, 65)))
+            second.clear()
+            self.assertIsNone(first.probe(0xABCDEF))
+            first.release()
+            second.release()
+        finally:
+            shared.close()
+            shared.unlink()
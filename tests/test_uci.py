@@ -0,0 +1,98 @@
+import io
+import time
+import unittest
+import chess
+from engine.uci import UCIEngine
+
+class TestUCI(unittest.TestCase):
+    def setUp(self):
+        self.output = io.StringIO()
+        self.uci = UCIEngine(self.output, hash_mb=1)
+
+    def tearDown(self):
+        self.uci.close()
+
+    def send(self, *lines: str):
+        for line in lines:
+            self.uci.handle(line)
+
+    def lines(self) -> list:
+        return self.output.getvalue().splitlines()
+
+    def bestmove(self, timeout: float = 10) -> list:
+        self.uci.thread.join(timeout)
+        line = self.lines()[-1]
+        self.assertTrue(line.startswith("bestmove"), line)
+        return line.split()
+
+    def test_handshake(self):
+        self.send("uci", "isready", "bogus command")
+        lines = self.lines()
+        self.assertTrue(lines[0].startswith("id name"))
+        self.assertIn("option name Hash type spin default 1 min 1 max 1024", lines)
+        self.assertEqual(lines[-2:], ["uciok", "readyok"])
+
+    def test_position_and_go(self):
+        self.send("position startpos moves e2e4 e7e5 g1f3", "go depth 3")
+        game = chess.Board()
+        for move in ("e2e4", "e7e5", "g1f3"):
+            game.push_uci(move)
+        tokens = self.bestmove()
+        self.assertIn(chess.Move.from_uci(tokens[1]), game.legal_moves)
+
+        info = [line for line in self.lines() if line.startswith("info depth")]
+        self.assertEqual(len(info), 3)
+        self.assertRegex(info[-1], r"^info depth 3 score cp -?\d+ nodes \d+ nps \d+ "
+                                   r"time \d+ hashfull \d+ pv( \w{4,5})+$")
+
+    def test_mate_score(self):
+        self.send("position fen r5k1/5ppp/8/8/8/8/3R1PPP/3R2K1 w - - 0 1", "go depth 4")
+        self.assertEqual(self.bestmove()[1], "d2d8")
+        self.assertIn("score mate 2 ", self.lines()[-2])
+
+    def test_go_infinite_waits_for_stop(self):
+        self.send("position fen 4k3/8/8/8/8/8/8/4K2R w K - 0 1", "go infinite depth 2")
+        time.sleep(0.5)
+        self.assertFalse(self.lines()[-1].startswith("bestmove"))
+        self.send("stop")
+        self.assertIsNone(self.uci.thread)
+        self.assertTrue(self.lines()[-1].startswith("bestmove"))
+
+    def test_ponderhit(self):
+        self.send("position startpos moves e2e4 e7e5", "go ponder movetime 200")
+        time.sleep(0.5)  # No clock while pondering
+        self.assertFalse(self.lines()[-1].startswith("bestmove"))
+        self.send("ponderhit")
+        tokens = self.bestmove(5)
+        self.assertEqual(len(tokens[1]), 4)
+
+    def test_setoption(self):
+        self.send("setoption name Hash value 2", "setoption name hash value many")
+        self.assertEqual(self.uci.engine.transposition_table.size_mb, 2)
+        self.assertEqual(self.lines(), ["info string invalid value for hash: many"])
+        self.send("ucinewgame", "position startpos", "go depth 2")
+        self.bestmove()
+
+    def test_bad_position_keeps_previous(self):
+        self.send("position startpos moves e2e4")
+        fen = self.uci.board.get_fen()
+        self.send("position startpos moves e2", "position startpos moves e2e5",
+                  "position startpos moves e2e4 e7e5 zz99", "position fen 8/8 w - - 0 1")
+        self.assertEqual(self.lines()[:3], ["info string illegal move: e2",
+                                            "info string illegal move: e2e5",
+                                            "info string illegal move: zz99"])
+        self.assertTrue(self.lines()[3].startswith("info string invalid position"))
+        self.assertEqual(self.uci.board.get_fen(), fen)
+
+    def test_bad_go_value(self):
+        self.send("position startpos", "go depth x movetime - depth 2")
+        self.bestmove()
+        self.assertEqual(self.lines()[:2], ["info string invalid value for depth: x",
+                                            "info string invalid value for movetime: -"])
+
+    def test_ponder_option(self):
+        # bestmove only suggests a ponder move when the GUI turned Ponder on
+        self.send("position startpos", "go depth 3")
+        self.assertEqual(len(self.bestmove()), 2)
+        self.send("setoption name Ponder value true", "go depth 3")
+        self.assertEqual(len(self.bestmove()), 4)
@@ -0,0 +1,52 @@
+import time
+import unittest
+import chess
+from engine.board import START_FEN, move_to_uci
+from engine.worker import SearchWorker
+
+class TestSearchWorker(unittest.TestCase):
+    def setUp(self):
+        self.worker = SearchWorker(hash_mb=1)
+        self.game = chess.Board()
+
+    def tearDown(self):
+        self.worker.close()
+
+    def play(self, move: int):
+        self.game.push(chess.Move.from_uci(move_to_uci(move)))
+
+    def test_think_in_background(self):
+        self.worker.think(START_FEN, depth=3)
+        self.assertTrue(self.worker.thinking)
+        score, move = self.worker.wait(10)
+        self.assertIn(chess.Move.from_uci(move_to_uci(move)), self.game.legal_moves)
+        self.assertFalse(self.worker.thinking)
+        self.assertIsNone(self.worker.poll())  # each result is handed out once
+
+    def test_ponder_hit(self):
+        self.worker.think(START_FEN, depth=3)
+        score, move = self.worker.wait(10)
+        self.play(move)
+        reply = self.worker.expected_reply()
+        self.assertIsNotNone(reply)
+
+        # No clock while pondering, so a movetime search keeps running
+        self.worker.ponder(self.game.fen(), reply, movetime=200)
+        time.sleep(0.4)
+        self.assertTrue(self.worker.pondering)
+        self.assertIsNone(self.worker.poll())
+
+        # The predicted reply turns the ponder search into the real one
+        self.game.push(chess.Move.from_uci(reply))
+        self.worker.think(self.game.fen(), last_move=reply, movetime=200)
+        self.assertEqual(self.worker.ponder_hits, 1)
+        score, move = self.worker.wait(5)
+        self.assertIn(chess.Move.from_uci(move_to_uci(move)), self.game.legal_moves)
+
+    def test_ponder_miss(self):
+        self.worker.ponder(START_FEN, "e2e4", movetime=200)
+        self.game.push(chess.Move.from_uci("d2d4"))
+        self.worker.think(self.game.fen(), last_move="d2d4", depth=2)
+        self.assertEqual(self.worker.ponder_hits, 0)
+        score, move = self.worker.wait(10)
+        self.assertIn(chess.Move.from_uci(move_to_uci(move)), self.game.legal_moves)